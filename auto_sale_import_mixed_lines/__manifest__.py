@@ -1,11 +1,18 @@
 {
     "name": "Importador con Líneas Combinadas",
-    "version": "17.0.5.0.0",
-    "summary": "Importa ventas desde Excel agrupadas por orden; soporta productos por default_code y líneas personalizadas con IVA 21%; confirmación, entrega, factura y validación opcional.",
+    "version": "17.0.11.0.0",
+    "summary": "Importa ventas desde Excel, CSV o Parquet agrupadas por orden; soporta productos por default_code y líneas personalizadas con IVA 21%; confirmación, entrega, factura y validación opcional.",
     "author": "Matías Artesi",
     "category": "Sales",
     "depends": ["sale_management", "stock", "account"],
-    "data": ["views/sale_import_wizard_view.xml"],
+    "data": [
+        "security/ir.model.access.csv",
+        "data/ir_cron.xml",
+        "views/sale_import_wizard_view.xml",
+        "views/sale_import_job_view.xml",
+        "views/sale_import_file_view.xml",
+        "views/sale_import_run_view.xml",
+    ],
     "installable": True,
     "auto_install": False,
     "license": "LGPL-3"
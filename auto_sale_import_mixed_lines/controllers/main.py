@@ -0,0 +1,120 @@
+import mimetypes
+import os
+import re
+import time
+import uuid
+
+from odoo import http
+from odoo.exceptions import AccessError, UserError
+from odoo.http import request
+
+UPLOAD_TOKEN_RE = re.compile(r'^[0-9a-f]{32}$')
+# Las subidas sin terminar se descartan después de un día
+UPLOAD_MAX_AGE = 24 * 3600
+# Tamaño máximo por defecto (parámetro del sistema auto_sale_import_mixed_lines.max_upload_size, en bytes)
+UPLOAD_MAX_SIZE = 2 * 1024 ** 3
+UPLOAD_BLOCK_SIZE = 1024 * 1024
+
+
+class SaleImportUpload(http.Controller):
+    """Subida por partes (y reanudable) del archivo a importar, directo a un adjunto en el filestore.
+    Sólo para vendedores (sales_team.group_sale_salesman).
+
+    1. /start devuelve un token y el tamaño máximo permitido.
+    2. /chunk agrega una parte (multipart, campo `chunk`) en `offset`. Si el offset no coincide con lo
+       ya recibido devuelve 409 con el offset correcto; /status lo informa para reanudar.
+    3. /finish crea el ir.attachment y devuelve su id, que se usa en el wizard o en import_sales_file.
+    """
+
+    def _check_upload_access(self):
+        if not request.env.user.has_group('sales_team.group_sale_salesman'):
+            raise AccessError("Sólo los usuarios de ventas pueden subir archivos de importación.")
+
+    def _max_upload_size(self):
+        return int(request.env['ir.config_parameter'].sudo().get_param(
+            'auto_sale_import_mixed_lines.max_upload_size', UPLOAD_MAX_SIZE))
+
+    def _upload_dir(self):
+        path = os.path.join(request.env['ir.attachment']._filestore(), 'sale_import_uploads')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _part_path(self, token):
+        self._check_upload_access()
+        if not UPLOAD_TOKEN_RE.match(token or ''):
+            raise UserError("Token de subida inválido.")
+        # El usuario forma parte del nombre: nadie puede continuar la subida de otro
+        return os.path.join(self._upload_dir(), f"{request.env.uid}-{token}.part")
+
+    def _existing_part_path(self, token):
+        path = self._part_path(token)
+        if not os.path.exists(path):
+            raise UserError("La subida no existe o expiró.")
+        return path
+
+    def _clean_stale_parts(self):
+        limit = time.time() - UPLOAD_MAX_AGE
+        with os.scandir(self._upload_dir()) as entries:
+            for entry in entries:
+                if entry.name.endswith('.part') and entry.stat().st_mtime < limit:
+                    os.unlink(entry.path)
+
+    @http.route('/sale_import/upload/start', type='json', auth='user')
+    def upload_start(self, size=None):
+        self._check_upload_access()
+        max_size = self._max_upload_size()
+        if size is not None and int(size) > max_size:
+            raise UserError(f"El archivo supera el tamaño máximo permitido ({max_size} bytes).")
+        self._clean_stale_parts()
+        token = uuid.uuid4().hex
+        open(self._part_path(token), 'wb').close()
+        return {'token': token, 'offset': 0, 'max_size': max_size}
+
+    @http.route('/sale_import/upload/status', type='json', auth='user')
+    def upload_status(self, token):
+        return {'token': token, 'offset': os.path.getsize(self._existing_part_path(token))}
+
+    # Sin CSRF para poder subir desde scripts: sólo se puede escribir en una subida propia y con su token
+    @http.route('/sale_import/upload/chunk', type='http', auth='user', methods=['POST'], csrf=False)
+    def upload_chunk(self, token, offset, chunk, **kwargs):
+        try:
+            path = self._existing_part_path(token)
+        except AccessError as e:
+            return request.make_json_response({'error': str(e)}, status=403)
+        except UserError as e:
+            return request.make_json_response({'error': str(e)}, status=404)
+        if not str(offset).isdigit():
+            return request.make_json_response({'error': "Offset inválido."}, status=400)
+        size = os.path.getsize(path)
+        if int(offset) != size:
+            return request.make_json_response({'token': token, 'offset': size}, status=409)
+
+        max_size = self._max_upload_size()
+        with open(path, 'ab') as f:
+            while True:
+                block = chunk.stream.read(UPLOAD_BLOCK_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_size:
+                    break
+                f.write(block)
+        if size > max_size:
+            os.unlink(path)
+            return request.make_json_response(
+                {'error': f"El archivo supera el tamaño máximo permitido ({max_size} bytes)."}, status=413)
+        return request.make_json_response({'token': token, 'offset': size})
+
+    @http.route('/sale_import/upload/finish', type='json', auth='user')
+    def upload_finish(self, token, file_name):
+        path = self._existing_part_path(token)
+        try:
+            attachment = request.env['sale.import.wizard']._create_attachment_from_path(path, {
+                'name': file_name,
+                'type': 'binary',
+                'mimetype': mimetypes.guess_type(file_name)[0] or 'application/octet-stream',
+            })
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+        return {'attachment_id': attachment.id, 'file_size': attachment.file_size}
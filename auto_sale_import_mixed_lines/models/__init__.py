@@ -1 +1,4 @@
 from . import sale_order
+from . import sale_import_job
+from . import sale_import_file
+from . import sale_import_run
@@ -0,0 +1,18 @@
+from odoo import models, fields
+
+
+class SaleImportFile(models.Model):
+    _name = 'sale.import.file'
+    _description = 'Archivo de ventas importado'
+    _order = 'last_import_date desc, id desc'
+
+    name = fields.Char("Nombre del archivo", required=True)
+    checksum = fields.Char("Huella (sha1)", required=True, index=True, readonly=True)
+    company_id = fields.Many2one('res.company', string="Compañía", required=True, default=lambda self: self.env.company)
+    file_size = fields.Integer("Tamaño (bytes)", readonly=True)
+    import_count = fields.Integer("Veces importado", default=1, readonly=True)
+    last_import_date = fields.Datetime("Última importación", default=fields.Datetime.now, readonly=True)
+
+    _sql_constraints = [
+        ('checksum_company_uniq', 'unique(checksum, company_id)', "Este archivo ya está registrado para la compañía."),
+    ]
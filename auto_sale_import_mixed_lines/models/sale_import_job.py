@@ -0,0 +1,239 @@
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+import base64, itertools, logging, time
+
+_logger = logging.getLogger(__name__)
+
+
+class SaleImportJob(models.Model):
+    _name = 'sale.import.job'
+    _description = 'Trabajo de importación de ventas'
+    _order = 'id desc'
+
+    name = fields.Char("Nombre", compute='_compute_name', store=True)
+    state = fields.Selection([
+        ('queued', 'En cola'),
+        ('running', 'En proceso'),
+        ('done', 'Terminado'),
+        ('failed', 'Fallido'),
+    ], string="Estado", default='queued', required=True, readonly=True)
+    company_id = fields.Many2one('res.company', string="Compañía", required=True, default=lambda self: self.env.company)
+    allowed_company_ids = fields.Many2many('res.company', string="Compañías habilitadas",
+        default=lambda self: self.env.companies,
+        help="Compañías activas del usuario al crear el trabajo; el proceso en segundo plano corre con las mismas.")
+
+    file = fields.Binary("Archivo (Excel, CSV o Parquet)")
+    attachment_id = fields.Many2one('ir.attachment', string="Archivo adjunto")
+    file_name = fields.Char("Nombre del archivo")
+    service_product_id = fields.Many2one('product.product', string="Producto servicio (líneas libres)")
+    validate_invoice = fields.Boolean("Validar factura automáticamente")
+    cancel_all_on_errors = fields.Boolean("Detener si hay errores", default=True,
+        help="Cada lote se confirma por separado: ante un error se deshace el lote actual y el trabajo "
+             "se detiene, pero los lotes anteriores quedan importados.")
+    preflight = fields.Boolean("Validar todo antes de importar", default=True)
+    skip_existing = fields.Boolean("Omitir órdenes ya importadas")
+    batch_create = fields.Boolean("Crear órdenes en lote")
+    chunk_savepoints = fields.Boolean("Un savepoint por lote")
+    batch_size = fields.Integer("Órdenes por lote", default=50)
+    streaming = fields.Boolean("Lectura en streaming (archivos grandes)")
+    chunk_size = fields.Integer("Órdenes por commit", default=100)
+
+    cursor = fields.Integer("Órdenes procesadas", readonly=True,
+        help="Cantidad de órdenes del archivo ya confirmadas; al reanudar se continúa desde aquí.")
+    order_count = fields.Integer("Órdenes detectadas", readonly=True)
+    error_count = fields.Integer("Errores", readonly=True)
+    progress = fields.Float("Progreso", compute='_compute_progress')
+    invoice_ids = fields.Many2many('account.move', string="Facturas", readonly=True)
+    file_registered = fields.Boolean("Huella registrada", readonly=True,
+        help="La huella del archivo se registra con el primer lote que crea órdenes.")
+    run_id = fields.Many2one('sale.import.run', string="Registro", readonly=True)
+
+    @api.depends('file_name')
+    def _compute_name(self):
+        for job in self:
+            job.name = job.file_name or "Importación de ventas"
+
+    @api.depends('cursor', 'order_count')
+    def _compute_progress(self):
+        for job in self:
+            job.progress = 100.0 * job.cursor / job.order_count if job.order_count else 0.0
+
+    def _get_import_wizard(self):
+        """Wizard en memoria con la configuración del trabajo: reutiliza toda la lógica de importación."""
+        return self.env['sale.import.wizard'].new({
+            'run_id': self.run_id.id,
+            'file_name': self.file_name,
+            'service_product_id': self.service_product_id.id,
+            'validate_invoice': self.validate_invoice,
+            'cancel_all_on_errors': self.cancel_all_on_errors,
+            'preflight': self.preflight,
+            'skip_existing': self.skip_existing,
+            'batch_create': self.batch_create,
+            'chunk_savepoints': self.chunk_savepoints,
+            'batch_size': self.batch_size,
+            'streaming': self.streaming,
+        })
+
+    def _get_data(self, wizard):
+        if self.attachment_id:
+            return wizard._get_attachment_data(self.attachment_id)
+        return base64.b64decode(self.file)
+
+    def _iter_pending_chunks(self, wizard):
+        """Lotes {order_name: [filas]} de `chunk_size` órdenes, salteando las `cursor` ya procesadas."""
+        data = self._get_data(wizard)
+        orders = itertools.chain.from_iterable(chunk.items() for chunk in wizard._iter_order_chunks(data))
+        orders = itertools.islice(orders, self.cursor, None)
+        chunk_size = max(self.chunk_size, 1)
+        while True:
+            chunk = dict(itertools.islice(orders, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def _log(self, lines, severity='info'):
+        """Agrega al registro de la importación líneas que no corresponden a una orden."""
+        self.run_id._add_lines([
+            {'order_name': False, 'severity': severity, 'stage': 'import', 'message': line} for line in lines
+        ])
+
+    def _process(self, deadline):
+        """Procesa lotes hasta terminar o hasta `deadline` (time.monotonic()), con commit por lote.
+        Devuelve True si el trabajo quedó pendiente."""
+        self.ensure_one()
+        if not self.run_id:
+            self.run_id = self.env['sale.import.run'].create({
+                'file_name': self.file_name,
+                'company_id': self.company_id.id,
+            })
+            # Confirmado ya: si el trabajo falla, el error se registra aquí
+            self.env.cr.commit()
+        wizard = self._get_import_wizard()
+        if self.state == 'queued':
+            data = self._get_data(wizard)
+            if self.preflight and self.cancel_all_on_errors:
+                order_count, errors, _index, skipped = wizard._preflight(data)
+                self.order_count = order_count + len(skipped)
+                if errors:
+                    # El detalle de los errores ya quedó en el registro (etapa de validación previa)
+                    self.error_count = len(errors)
+                    self._log(["La validación previa encontró errores, no se importó ninguna orden."], 'warning')
+                    self.state = 'failed'
+                    self.run_id.write({'state': 'cancelled', 'order_count': self.order_count})
+                    self.env.cr.commit()
+                    return False
+
+            self.state = 'running'
+            if not self.order_count:
+                self.order_count = sum(len(chunk) for chunk in wizard._iter_order_chunks(data))
+            self.run_id.order_count = self.order_count
+            self.env.cr.commit()
+
+        index = None
+        for chunk in self._iter_pending_chunks(wizard):
+            errors = []
+            skipped = []
+            pending = chunk
+            if self.skip_existing:
+                pending, skipped = wizard._skip_existing_orders(chunk)
+            invoices = self.env['account.move']
+            try:
+                with self.env.cr.savepoint():
+                    if pending:
+                        index = wizard._build_import_index(pending, index)
+                        invoices = wizard._import_grouped_orders(pending, index, errors)
+                    if errors and self.cancel_all_on_errors:
+                        raise UserError("Se detectaron errores y se canceló el lote:\n- " + "\n- ".join(errors))
+            except Exception as e:
+                _logger.warning("sale.import.job %s: lote desde la orden %s fallido: %s", self.id, self.cursor, e)
+                self.error_count += len(errors) or 1
+                if errors:
+                    wizard._log_errors('import', errors)
+                else:
+                    self._log([f"Lote desde la orden {self.cursor + 1}: {e}"], 'error')
+                self._log([f"❌ Se deshizo el lote desde la orden {self.cursor + 1} y el trabajo se detuvo."], 'warning')
+                self.state = 'failed'
+                self.run_id.state = 'failed'
+                self.env.cr.commit()
+                return False
+
+            self.invoice_ids |= invoices
+            if invoices and not self.file_registered:
+                wizard._register_import_file(*wizard._import_file_fingerprint(self._get_data(wizard)))
+                self.file_registered = True
+            self.cursor += len(chunk)
+            self.error_count += len(errors)
+            self._log([f"Órdenes {self.cursor - len(chunk) + 1}-{self.cursor}: {len(pending)} procesadas."])
+            if skipped:
+                wizard._log_lines('skip', 'warning', [(str(order), "Ya existe, se omite.") for order in skipped])
+                self.run_id.skipped_count += len(skipped)
+            wizard._log_errors('import', errors)
+            self.env.cr.commit()
+            if self.validate_invoice:
+                # Los diarios AFIP hacen commit por CAE: se publican fuera del savepoint del lote
+                afip_errors = []
+                wizard._post_afip_invoices(invoices, afip_errors)
+                if afip_errors:
+                    self.error_count += len(afip_errors)
+                    wizard._log_errors('import', afip_errors)
+                    self.env.cr.commit()
+                    if self.cancel_all_on_errors:
+                        self.state = 'failed'
+                        self.run_id.state = 'failed'
+                        self.env.cr.commit()
+                        return False
+            if time.monotonic() > deadline:
+                return True
+
+        self.state = 'done'
+        self.run_id.state = 'done'
+        self._log(["Importación completada sin errores." if not self.error_count else "Importación completada con errores."])
+        self.env.cr.commit()
+        return False
+
+    def _set_failed(self, error):
+        self.error_count += 1
+        if self.run_id:
+            self._log([f"❌ {error}"], 'error')
+            self.run_id.state = 'failed'
+        self.state = 'failed'
+        self.env.cr.commit()
+
+    def _get_allowed_company_ids(self):
+        """Compañías con las que se creó el trabajo (la principal primero), como en el wizard:
+        un archivo con órdenes de varias compañías necesita todas habilitadas."""
+        companies = (self.allowed_company_ids | self.company_id) & self.create_uid.company_ids
+        return self.company_id.ids + (companies - self.company_id).ids
+
+    @api.model
+    def _cron_process_jobs(self):
+        time_limit = int(self.env['ir.config_parameter'].sudo().get_param(
+            'auto_sale_import_mixed_lines.job_time_limit', 240))
+        deadline = time.monotonic() + time_limit
+        pending = False
+        for job in self.search([('state', 'in', ('queued', 'running'))], order='id'):
+            job = job.with_user(job.create_uid).with_context(allowed_company_ids=job._get_allowed_company_ids())
+            try:
+                pending = job._process(deadline)
+            except Exception as e:
+                # Archivo ilegible, columnas faltantes, etc.: el trabajo falla y la cola sigue con el próximo
+                _logger.exception("sale.import.job %s: falló el procesamiento", job.id)
+                self.env.cr.rollback()
+                job._set_failed(e)
+                pending = False
+                continue
+            if pending:
+                break
+        if pending:
+            # Quedan lotes: se vuelve a disparar la acción planificada en lugar de agotar el límite del worker
+            self.env.ref('auto_sale_import_mixed_lines.ir_cron_sale_import_job').sudo()._trigger()
+
+    def action_view_run_lines(self):
+        self.ensure_one()
+        return self.run_id.action_view_lines()
+
+    def action_resume(self):
+        failed = self.filtered(lambda j: j.state == 'failed')
+        failed.write({'state': 'running'})
+        failed.run_id.write({'state': 'running'})
+        self.env.ref('auto_sale_import_mixed_lines.ir_cron_sale_import_job').sudo()._trigger()
@@ -0,0 +1,75 @@
+from odoo import models, fields, api
+
+
+class SaleImportRun(models.Model):
+    _name = 'sale.import.run'
+    _description = 'Registro de importación de ventas'
+    _order = 'id desc'
+
+    name = fields.Char("Nombre", compute='_compute_name', store=True)
+    file_name = fields.Char("Archivo", readonly=True)
+    company_id = fields.Many2one('res.company', string="Compañía", required=True, default=lambda self: self.env.company)
+    simulate = fields.Boolean("Simulación", readonly=True)
+    state = fields.Selection([
+        ('running', 'En proceso'),
+        ('done', 'Terminada'),
+        ('cancelled', 'Cancelada'),
+        ('failed', 'Fallida'),
+    ], string="Estado", default='running', required=True, readonly=True)
+    order_count = fields.Integer("Órdenes detectadas", readonly=True)
+    skipped_count = fields.Integer("Órdenes omitidas", readonly=True)
+    error_count = fields.Integer("Errores", readonly=True)
+    line_count = fields.Integer("Líneas", compute='_compute_line_count')
+    summary = fields.Text("Resumen", readonly=True)
+    line_ids = fields.One2many('sale.import.log', 'run_id', string="Líneas del registro", readonly=True)
+
+    @api.depends('file_name')
+    def _compute_name(self):
+        for run in self:
+            run.name = run.file_name or "Importación de ventas"
+
+    def _compute_line_count(self):
+        counts = dict(self.env['sale.import.log']._read_group(
+            [('run_id', 'in', self.ids)], ['run_id'], ['__count']))
+        for run in self:
+            run.line_count = counts.get(run, 0)
+
+    def _add_lines(self, vals_list):
+        """Inserta en bloque las líneas {order_name, severity, stage, message} y actualiza el contador de errores."""
+        self.ensure_one()
+        self.env['sale.import.log'].create([dict(vals, run_id=self.id) for vals in vals_list])
+        errors = sum(1 for vals in vals_list if vals['severity'] == 'error')
+        if errors:
+            self.error_count += errors
+
+    def action_view_lines(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': self.name,
+            'res_model': 'sale.import.log',
+            'view_mode': 'tree',
+            'domain': [('run_id', '=', self.id)],
+            'context': {'search_default_errors': 1} if self.error_count else {},
+            'target': 'current',
+        }
+
+
+class SaleImportLog(models.Model):
+    _name = 'sale.import.log'
+    _description = 'Línea de registro de importación de ventas'
+    _order = 'id'
+
+    run_id = fields.Many2one('sale.import.run', string="Registro", required=True, ondelete='cascade', index=True)
+    order_name = fields.Char("Orden", index=True)
+    severity = fields.Selection([
+        ('info', 'Información'),
+        ('warning', 'Advertencia'),
+        ('error', 'Error'),
+    ], string="Severidad", required=True, default='info', index=True)
+    stage = fields.Selection([
+        ('preflight', 'Validación previa'),
+        ('skip', 'Órdenes existentes'),
+        ('import', 'Importación'),
+    ], string="Etapa", required=True)
+    message = fields.Text("Mensaje")
@@ -1,18 +1,56 @@
 from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+from ..profiler import import_stage
 
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
 
     invoice_date_import = fields.Date(string="Fecha de Factura (importación)")
 
+    def _get_outgoing_pickings_to_validate(self):
+        return self.picking_ids.filtered(
+            lambda p: p.picking_type_code == 'outgoing' and p.state not in ('done', 'cancel')
+        )
+
+    def _prepare_fallback_move_line_vals(self, move):
+        return {
+            'move_id': move.id,
+            'picking_id': move.picking_id.id,
+            'product_id': move.product_id.id,
+            'location_id': move.location_id.id,
+            'location_dest_id': move.location_dest_id.id,
+            'product_uom_id': move.product_uom.id,
+            # qty_done se completará al validar vía wizard si hace falta
+            'qty_done': 0.0,
+        }
+
+    def _process_picking_wizard(self, res):
+        """Si Odoo devuelve un wizard (inmediata/backorder), lo procesa genéricamente."""
+        if not isinstance(res, dict):
+            return
+        model = res.get('res_model')
+        res_id = res.get('res_id')
+        if not model:
+            return
+        if res_id:
+            wiz = self.env[model].browse(res_id)
+        elif res.get('context'):
+            # Los wizards de validación múltiple llegan sin res_id, sólo con el contexto (default_pick_ids)
+            wiz = self.env[model].with_context(res['context']).create({})
+        else:
+            return
+        for method in ('process', 'process_cancel_backorder', 'action_validate'):
+            if hasattr(wiz, method):
+                getattr(wiz, method)()
+                break
+
     def _validate_outgoing_pickings(self):
         """Valida pickings de salida sin tocar campos frágiles.
         1) Reserva, 2) Setea cantidades hechas = reservadas, 3) Valida,
         4) Si hay wizard (inmediata/backorder), lo procesa.
         """
-        for picking in self.picking_ids.filtered(
-            lambda p: p.picking_type_code == 'outgoing' and p.state not in ('done', 'cancel')
-        ):
+        for picking in self._get_outgoing_pickings_to_validate():
             # 1) Intentar reservar
             picking.action_assign()
 
@@ -25,38 +63,53 @@ class SaleOrder(models.Model):
                 # intentamos al menos asegurar que existan move lines
                 for move in picking.move_ids_without_package:
                     if not move.move_line_ids:
-                        self.env['stock.move.line'].create({
-                            'move_id': move.id,
-                            'picking_id': picking.id,
-                            'product_id': move.product_id.id,
-                            'location_id': move.location_id.id,
-                            'location_dest_id': move.location_dest_id.id,
-                            'product_uom_id': move.product_uom.id,
-                            # qty_done se completará al validar vía wizard si hace falta
-                            'qty_done': 0.0,
-                        })
+                        self.env['stock.move.line'].create(self._prepare_fallback_move_line_vals(move))
 
             # 3) Validar
             res = picking.button_validate()
 
             # 4) Si Odoo devuelve un wizard (inmediata/backorder), procesarlo genéricamente
-            if isinstance(res, dict):
-                model = res.get('res_model')
-                res_id = res.get('res_id')
-                if model and res_id:
-                    wiz = self.env[model].browse(res_id)
-                    for method in ('process', 'process_cancel_backorder', 'action_validate'):
-                        if hasattr(wiz, method):
-                            getattr(wiz, method)()
-                            break
-
-    @api.model
-    def create(self, vals):
-        order = super().create(vals)
+            self._process_picking_wizard(res)
+
+    def _validate_outgoing_pickings_batch(self):
+        """Variante de _validate_outgoing_pickings para muchas órdenes: cada paso corre una sola vez
+        sobre todos los pickings de salida y el wizard resultante se procesa una vez para el lote.
+        """
+        pickings = self._get_outgoing_pickings_to_validate()
+        if not pickings:
+            return
+
+        pickings.action_assign()
+        try:
+            pickings.action_set_quantities_to_reservation()
+        except Exception:
+            moves = pickings.move_ids_without_package.filtered(lambda m: not m.move_line_ids)
+            if moves:
+                self.env['stock.move.line'].create([self._prepare_fallback_move_line_vals(m) for m in moves])
+
+        res = pickings.button_validate()
+        self._process_picking_wizard(res)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        with import_stage(self.env, "orden: creación", rows=len(vals_list)):
+            orders = super().create(vals_list)
         if self.env.context.get('auto_invoice_on_import'):
-            order.action_confirm()                 # crea pickings/moves
-            order._validate_outgoing_pickings()    # validación robusta sin tocar fields frágiles
-            invoice = order._create_invoices()     # factura borrador
-            if invoice and order.invoice_date_import:
-                invoice.invoice_date = order.invoice_date_import
-        return order
+            with import_stage(self.env, "orden: confirmación", rows=len(orders)):
+                orders.action_confirm()                 # crea pickings/moves
+            with import_stage(self.env, "orden: entregas", rows=len(orders)):
+                if len(orders) > 1:
+                    orders._validate_outgoing_pickings_batch()  # un paso por etapa para todo el lote
+                else:
+                    orders._validate_outgoing_pickings()    # validación robusta sin tocar fields frágiles
+            with import_stage(self.env, "orden: facturación", rows=len(orders)):
+                # grouped=True: una factura borrador por orden aunque compartan cliente
+                invoices = orders._create_invoices(grouped=True)
+                # Con varias órdenes _create_invoices omite las que no tienen nada para facturar
+                # (con una sola levanta error): se levanta igual para que la bisección las aísle
+                not_invoiced = orders.filtered(lambda o: not (o.invoice_ids & invoices))
+                if not_invoiced:
+                    raise UserError("Órdenes sin líneas para facturar: %s" % ", ".join(not_invoiced.mapped('name')))
+                for order in orders.filtered('invoice_date_import'):
+                    (order.invoice_ids & invoices).invoice_date = order.invoice_date_import
+        return orders
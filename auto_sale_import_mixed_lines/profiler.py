@@ -0,0 +1,65 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+# Clave de contexto con la que la importación comparte el profiler con sale.order
+PROFILER_CONTEXT_KEY = 'sale_import_profiler'
+
+
+class ImportProfiler:
+    """Acumula por etapa el tiempo, las consultas SQL y las filas procesadas de una importación,
+    y el tiempo de creación de cada orden."""
+
+    def __init__(self, cr, slow_order_threshold=0.0):
+        self.cr = cr
+        self.slow_order_threshold = slow_order_threshold
+        self.stages = {}
+        self.order_times = {}
+
+    @contextmanager
+    def stage(self, name, rows=0):
+        stats = self.stages.setdefault(name, {'time': 0.0, 'queries': 0, 'rows': 0, 'calls': 0})
+        start, queries = time.perf_counter(), self.cr.sql_log_count
+        try:
+            yield stats
+        finally:
+            stats['time'] += time.perf_counter() - start
+            stats['queries'] += self.cr.sql_log_count - queries
+            stats['rows'] += rows
+            stats['calls'] += 1
+
+    def add_order_time(self, order_name, seconds):
+        self.order_times[order_name] = self.order_times.get(order_name, 0.0) + seconds
+
+    def slow_orders(self, limit=20):
+        if not self.slow_order_threshold:
+            return []
+        slow = [(t, name) for name, t in self.order_times.items() if t >= self.slow_order_threshold]
+        return sorted(slow, reverse=True)[:limit]
+
+    def summary_lines(self):
+        lines = ["\nTiempos por etapa (las etapas 'orden: …' están incluidas en 'creación de órdenes'):"]
+        for name, stats in self.stages.items():
+            lines.append(
+                f"- {name}: {stats['time']:.2f}s, {stats['queries']} consultas, {stats['rows']} filas, "
+                f"{stats['calls']} llamadas"
+            )
+        slow = self.slow_orders()
+        if slow:
+            lines.append(f"Órdenes más lentas (≥ {self.slow_order_threshold:g}s):")
+            lines.extend(f"- {name}: {seconds:.2f}s" for seconds, name in slow)
+        return lines
+
+    def log(self, logger, label):
+        for name, stats in self.stages.items():
+            logger.info(
+                "sale_import profile=%s stage=%r time=%.3f queries=%d rows=%d calls=%d",
+                label, name, stats['time'], stats['queries'], stats['rows'], stats['calls'],
+            )
+        for seconds, name in self.slow_orders():
+            logger.info("sale_import profile=%s slow_order=%r time=%.3f", label, name, seconds)
+
+
+def import_stage(env, name, rows=0):
+    """Etapa del profiler activo en el contexto de `env`, o un contexto vacío si no se está midiendo."""
+    profiler = env.context.get(PROFILER_CONTEXT_KEY)
+    return profiler.stage(name, rows) if profiler else nullcontext()
@@ -0,0 +1,4 @@
+from . import test_normalization
+from . import test_benchmark
+from . import test_file_formats
+from . import test_tax_resolution
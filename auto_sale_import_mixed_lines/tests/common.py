@@ -0,0 +1,44 @@
+import random
+from datetime import date, timedelta
+from io import BytesIO
+
+import pandas as pd
+
+WORKBOOK_COLUMNS = [
+    'name', 'partner_id/name', 'company_id', 'date_order', 'invoice_date_import', 'journal_code',
+    'default_code', 'order_line/product_id/name', 'order_line/product_uom_qty', 'order_line/price_unit',
+]
+
+
+def make_sale_workbook(order_count=100, lines_per_order=3, free_ratio=0.2, companies=(None,),
+                       partners=('Cliente',), product_codes=('P00001',), journal_codes=(None,), seed=0):
+    """Genera una planilla de ventas sintética en el formato del importador y devuelve los bytes del xlsx.
+
+    Las cabeceras sólo van en la primera fila de cada orden, como en las planillas reales. Compañías,
+    clientes y códigos de diario se reparten en ronda entre las órdenes; `free_ratio` es la proporción
+    de líneas libres (sin default_code)."""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    rows = []
+    for n in range(order_count):
+        header = {
+            'name': f"BENCH{n:06d}",
+            'partner_id/name': partners[n % len(partners)],
+            'company_id': companies[n % len(companies)],
+            'date_order': start + timedelta(days=n % 365),
+            'invoice_date_import': start + timedelta(days=n % 365),
+            'journal_code': journal_codes[n % len(journal_codes)],
+        }
+        for i in range(lines_per_order):
+            row = dict(header) if i == 0 else {}
+            row['order_line/product_uom_qty'] = rng.randint(1, 5)
+            if rng.random() < free_ratio:
+                row['order_line/product_id/name'] = f"Servicio {n}-{i}"
+                row['order_line/price_unit'] = round(rng.uniform(10, 1000), 2)
+            else:
+                row['default_code'] = rng.choice(product_codes)
+            rows.append(row)
+
+    buffer = BytesIO()
+    pd.DataFrame(rows, columns=WORKBOOK_COLUMNS).to_excel(buffer, index=False)
+    return buffer.getvalue()
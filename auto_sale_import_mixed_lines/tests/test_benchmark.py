@@ -0,0 +1,136 @@
+import base64
+import gc
+import json
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.tests import tagged
+
+from .common import make_sale_workbook
+
+_logger = logging.getLogger(__name__)
+
+ORDER_COUNT = 200
+LINES_PER_ORDER = 3
+FREE_RATIO = 0.2
+PRODUCT_COUNT = 50
+PARTNER_COUNT = 10
+JOURNAL_CODES = ('00001', '00002')
+
+
+@tagged('post_install', '-at_install', '-standard', 'sale_import_benchmark')
+class TestSaleImportBenchmark(AccountTestInvoicingCommon):
+    """Mide tiempo, consultas por orden y pico de memoria de action_import_sales.
+
+    No corre por defecto: usar --test-tags sale_import_benchmark. Los resultados se escriben en JSON en
+    $SALE_IMPORT_BENCHMARK_OUTPUT (o sale_import_benchmark.json en el directorio temporal)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        company = cls.company_data['company']
+        cls.products = cls.env['product.product'].create([{
+            'name': f"Producto {n}",
+            'default_code': f"P{n:05d}",
+            'type': 'consu',
+            'list_price': 100.0 + n,
+            'taxes_id': [(6, 0, cls.company_data['default_tax_sale'].ids)],
+        } for n in range(PRODUCT_COUNT)])
+        cls.service_product = cls.env['product.product'].create({
+            'name': "Servicio libre",
+            'type': 'service',
+            'sale_ok': True,
+            'invoice_policy': 'order',
+        })
+        cls.partners = cls.env['res.partner'].create([
+            {'name': f"Cliente Benchmark {n}"} for n in range(PARTNER_COUNT)
+        ])
+        for code in JOURNAL_CODES:
+            cls.company_data['default_journal_sale'].copy({'name': f"Ventas {code}", 'code': code})
+
+        cls.workbook = make_sale_workbook(
+            order_count=ORDER_COUNT,
+            lines_per_order=LINES_PER_ORDER,
+            free_ratio=FREE_RATIO,
+            companies=(company.name,),
+            partners=tuple(cls.partners.mapped('name')),
+            product_codes=tuple(cls.products.mapped('default_code')),
+            journal_codes=JOURNAL_CODES,
+        )
+        cls.results = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        module = cls.env['ir.module.module'].search([('name', '=', 'auto_sale_import_mixed_lines')])
+        output = os.environ.get('SALE_IMPORT_BENCHMARK_OUTPUT') or os.path.join(
+            tempfile.gettempdir(), 'sale_import_benchmark.json')
+        with open(output, 'w') as f:
+            json.dump({
+                'module_version': module.latest_version,
+                'orders': ORDER_COUNT,
+                'lines_per_order': LINES_PER_ORDER,
+                'free_ratio': FREE_RATIO,
+                'results': cls.results,
+            }, f, indent=2, sort_keys=True)
+        _logger.info("Resultados del benchmark de importación en %s", output)
+        super().tearDownClass()
+
+    def _run_import(self, scenario, **options):
+        wizard = self.env['sale.import.wizard'].create({
+            'file': base64.b64encode(self.workbook),
+            'file_name': 'benchmark.xlsx',
+            'service_product_id': self.service_product.id,
+            **options,
+        })
+        self.env.flush_all()
+        self.env.invalidate_all()
+        gc.collect()
+
+        tracemalloc.start()
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        wizard.action_import_sales()
+        self.env.flush_all()
+        wall_time = time.perf_counter() - start
+        queries = self.env.cr.sql_log_count - queries
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.results[scenario] = {
+            'options': options,
+            'wall_time': round(wall_time, 3),
+            'orders_per_second': round(ORDER_COUNT / wall_time, 1),
+            'queries': queries,
+            'queries_per_order': round(queries / ORDER_COUNT, 1),
+            'peak_memory_kb': peak // 1024,
+        }
+        _logger.info("Benchmark %s: %s", scenario, self.results[scenario])
+        return wizard
+
+    def _imported_orders(self):
+        return self.env['sale.order'].search([('name', '=like', 'BENCH%')])
+
+    def test_simulate(self):
+        wizard = self._run_import('simulate', simulate=True)
+        self.assertIn(f"Órdenes detectadas: {ORDER_COUNT}", wizard.result_summary)
+        self.assertNotIn("Errores detectados", wizard.result_summary)
+        self.assertFalse(self._imported_orders())
+
+    def test_import(self):
+        self._run_import('import')
+        self.assertEqual(len(self._imported_orders()), ORDER_COUNT)
+
+    def test_import_batch_create(self):
+        self._run_import('import_batch_create', batch_create=True, batch_size=50)
+        self.assertEqual(len(self._imported_orders()), ORDER_COUNT)
+
+    def test_import_validate_invoice(self):
+        self._run_import('import_validate_invoice', validate_invoice=True)
+        invoices = self._imported_orders().invoice_ids
+        self.assertEqual(len(invoices), ORDER_COUNT)
+        self.assertEqual(set(invoices.mapped('state')), {'posted'})
@@ -0,0 +1,81 @@
+from datetime import date, datetime
+
+from odoo.tests import TransactionCase, tagged
+
+SEMICOLON_CSV = (
+    "name;partner_id;default_code;order_line/product_uom_qty;order_line/price_unit;date_order\n"
+    "S1;Cliente;00123;2,5;1234,56;05/01/2024\n"
+    ";;P2;1;1.234,50;\n"
+    ";;P3;x;;\n"
+).encode('utf-8')
+
+COMMA_CSV = (
+    "name,partner_id,default_code,order_line/product_uom_qty,order_line/price_unit,date_order\n"
+    "S1,Cliente,00123,2.5,1234.56,2024-01-05\n"
+).encode('utf-8')
+
+
+@tagged('post_install', '-at_install')
+class TestImportFileFormats(TransactionCase):
+    """Lectura de CSV (separador, coma decimal, textos) y fechas escritas como texto."""
+
+    def _wizard(self, **vals):
+        return self.env['sale.import.wizard'].new(dict({'file_name': 'ventas.csv', 'batch_size': 10}, **vals))
+
+    def test_csv_read_options(self):
+        wizard = self._wizard()
+        options = wizard._csv_read_options(SEMICOLON_CSV)
+        self.assertEqual(options['sep'], ';')
+        self.assertEqual((options['decimal'], options['thousands']), (',', '.'))
+        self.assertEqual(options['dtype']['default_code'], str)
+
+        options = wizard._csv_read_options(COMMA_CSV)
+        self.assertEqual(options['sep'], ',')
+        self.assertNotIn('decimal', options)
+
+        options = wizard._csv_read_options("name;partner_id\nS1;Peña\n".encode('latin-1'))
+        self.assertEqual(options['encoding'], 'latin-1')
+
+    def test_to_date(self):
+        wizard = self._wizard()
+        cases = [
+            ("05/01/2024", date(2024, 1, 5)),
+            ("1/5/2024", date(2024, 5, 1)),
+            ("2024-01-05", date(2024, 1, 5)),
+            (" 2024-01-05 10:30:00 ", date(2024, 1, 5)),
+            ("05/01/2024 10:30", date(2024, 1, 5)),
+            (datetime(2024, 1, 5, 10, 30), date(2024, 1, 5)),
+            ("Jan 5 2024", False),
+            ("31/02/2024", False),
+            ("nan", False),
+            (None, False),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(wizard._to_date(value), expected)
+
+    def _lines(self, wizard, data):
+        return [line for chunk in wizard._iter_order_chunks(data) for line in chunk['S1']]
+
+    def test_csv_loader_decimal_comma(self):
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming):
+                wizard = self._wizard(streaming=streaming)
+                lines = self._lines(wizard, SEMICOLON_CSV)
+                self.assertEqual(len(lines), 3)
+                self.assertEqual(wizard._row_default_code(lines[0]), '00123')
+                self.assertEqual(wizard._row_qty(lines[0]), 2.5)
+                self.assertEqual(wizard._row_price_unit(lines[0]), 1234.56)
+                self.assertEqual(wizard._row_price_unit(lines[1]), 1234.5)
+                self.assertEqual(wizard._to_date(lines[0]['date_order']), date(2024, 1, 5))
+                self.assertEqual(wizard._row_number_errors(lines[0]), [])
+                self.assertEqual(wizard._row_number_errors(lines[2]),
+                                 ["Cantidad inválida en order_line/product_uom_qty: x"])
+
+    def test_csv_loader_decimal_point(self):
+        wizard = self._wizard()
+        line = self._lines(wizard, COMMA_CSV)[0]
+        self.assertEqual(wizard._row_default_code(line), '00123')
+        self.assertEqual(wizard._row_qty(line), 2.5)
+        self.assertEqual(wizard._row_price_unit(line), 1234.56)
+        self.assertEqual(wizard._to_date(line['date_order']), date(2024, 1, 5))
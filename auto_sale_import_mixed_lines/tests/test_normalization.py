@@ -0,0 +1,100 @@
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from odoo.tests import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+N = 200000
+TYPICAL_COLUMNS = {
+    '_norm_name': {'floats', 'ints', 'texts'},
+    '_norm_str': {'floats', 'ints', 'texts', 'journal_codes'},
+    '_norm_journal_code': {'floats', 'ints', 'journal_codes'},
+}
+
+
+@tagged('post_install', '-at_install')
+class TestVectorizedNormalization(TransactionCase):
+    """Las versiones vectorizadas deben dar exactamente lo mismo que los helpers escalares."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.wizard = cls.env['sale.import.wizard']
+        rng = np.random.default_rng(42)
+
+        floats = np.where(
+            rng.random(N) < 0.5,
+            rng.integers(-10 ** 6, 10 ** 6, N).astype(float),
+            rng.normal(0, 1e4, N),
+        )
+        floats[rng.random(N) < 0.2] = np.nan
+        floats[:6] = [1e20, -0.0, 1e-5, 2.5e15, 123456789012.5, 0.1 + 0.2]
+
+        odd_values = [
+            '  ABC-1 ', ' nan', 'NULL', '', 'None', 'x y', ' 015 ', '15,0', '1e1', 'abc16', '1234567',
+            '15.', '+15', '-3', '-0', '15.5', '0015', '12345678901234567890', '١٢', '15,000', '.0',
+            None, np.nan, 15.0, 7, 2.5, 10 ** 20, True,
+        ]
+        cls.columns = {
+            'floats': pd.Series(floats),
+            'ints': pd.Series(rng.integers(-10 ** 9, 10 ** 9, N)),
+            'texts': pd.Series(
+                [f" C{v} " if v % 7 else None for v in rng.integers(0, 1000, N)], dtype=object),
+            'journal_codes': pd.Series(
+                [str(v).zfill(v % 6) if v % 5 else np.nan for v in rng.integers(0, 99999, N)], dtype=object),
+            'mixed': pd.Series(
+                [odd_values[i] for i in rng.integers(0, len(odd_values), N)], dtype=object),
+        }
+
+    def _canon(self, values):
+        return [None if v is None or (isinstance(v, float) and np.isnan(v)) else v for v in values]
+
+    def _compare(self, series, vectorized, scalar):
+        start = time.perf_counter()
+        expected = series.apply(scalar)
+        scalar_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = vectorized(series)
+        vectorized_time = time.perf_counter() - start
+
+        self.assertEqual(list(result.index), list(series.index))
+        expected, result = self._canon(expected.tolist()), self._canon(result.tolist())
+        mismatches = [
+            (series.iloc[i], expected[i], result[i])
+            for i in range(len(series))
+            if expected[i] != result[i] or type(expected[i]) is not type(result[i])
+        ]
+        self.assertFalse(mismatches[:10])
+        return scalar_time, vectorized_time
+
+    def test_parity_and_speed(self):
+        wizard = self.wizard
+        helpers = [
+            ('_norm_name', wizard._norm_name_series, wizard._norm_name),
+            ('_norm_str', wizard._norm_str_series, wizard._norm_str),
+            ('_norm_journal_code', wizard._norm_journal_code_series, wizard._norm_journal_code),
+        ]
+        for column, series in self.columns.items():
+            for helper, vectorized, scalar in helpers:
+                with self.subTest(column=column, helper=helper):
+                    scalar_time, vectorized_time = self._compare(series, vectorized, scalar)
+                    _logger.info(
+                        "%s sobre %s (%s filas): escalar %.3fs, vectorizado %.3fs",
+                        helper, column, len(series), scalar_time, vectorized_time,
+                    )
+                    # Sólo se exige velocidad en las columnas típicas de cada helper; el resto
+                    # (textos libres como código de diario, tipos mezclados) cae en el helper escalar
+                    if column in TYPICAL_COLUMNS[helper]:
+                        self.assertLess(vectorized_time, scalar_time)
+
+    def test_small_columns(self):
+        wizard = self.wizard
+        for series in (pd.Series([], dtype=object), pd.Series([np.nan]), pd.Series([None, ' 15 '])):
+            for vectorized, scalar in ((wizard._norm_str_series, wizard._norm_str),
+                                       (wizard._norm_journal_code_series, wizard._norm_journal_code)):
+                self._compare(series, vectorized, scalar)
@@ -0,0 +1,60 @@
+import datetime
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.tests import tagged
+
+
+@tagged('post_install', '-at_install')
+class TestTaxResolution(AccountTestInvoicingCommon):
+    """La columna order_line/tax_id se resuelve contra el índice de impuestos, sin consultas por línea."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.company_data['company']
+        cls.wizard = cls.env['sale.import.wizard']
+        cls.taxes = cls.env['account.tax'].create([{
+            'name': name,
+            'amount': amount,
+            'type_tax_use': 'sale',
+            'company_id': cls.company.id,
+        } for name, amount in [
+            ("IVA 21% (importación)", 21.0),
+            ("IVA 10,5% (importación)", 10.5),
+            ("IVA 27% (importación)", 27.0),
+            ("IVA Exento (importación)", 0.0),
+            ("Percepción IIBB (importación)", 3.0),
+        ]])
+        cls.index = {'taxes': cls.wizard._build_tax_index([cls.company.id])}
+
+    def _resolve(self, value):
+        return self.wizard._lookup_tax(self.index, self.company, self.wizard._norm_tax_key(value))
+
+    def test_rates(self):
+        cases = [(21, 21.0), ("21", 21.0), ("10,5%", 10.5), ("IVA 27%", 27.0), (0.105, 10.5), ("0,105", 10.5)]
+        for value, amount in cases:
+            with self.subTest(value=value):
+                tax = self._resolve(value)
+                self.assertTrue(tax)
+                self.assertEqual(tax.amount, amount)
+
+    def test_exempt(self):
+        tax = self._resolve("Exento")
+        self.assertTrue(tax)
+        self.assertEqual(tax.amount, 0.0)
+
+    def test_name(self):
+        self.assertEqual(self._resolve("Percepción IIBB (importación)"), self.taxes[4])
+
+    def test_empty_cell_uses_iva_21(self):
+        self.assertIsNone(self.wizard._norm_tax_key(None))
+        self.assertEqual(self._resolve("  ").amount, 21.0)
+
+    def test_date_cell_is_not_found(self):
+        self.assertFalse(self._resolve(datetime.datetime(2024, 1, 5)))
+        self.assertFalse(self._resolve("IVA 99%"))
+
+    def test_no_queries_per_line(self):
+        with self.assertQueryCount(0):
+            for value in (21, "10,5%", "IVA 27%", "Exento", "Percepción IIBB (importación)", None):
+                self._resolve(value)
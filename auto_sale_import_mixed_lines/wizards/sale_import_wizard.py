@@ -1,30 +1,126 @@
 from odoo import models, fields, api
 from odoo.exceptions import UserError
+from odoo.tools import config
 import base64, math
+import numpy as np
 import pandas as pd
 from io import BytesIO
 from datetime import datetime
-import io, zipfile
+import codecs, csv, hashlib, itertools, os, shutil, tempfile, threading, zipfile
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import openpyxl
+import time
+
+from ..profiler import ImportProfiler, PROFILER_CONTEXT_KEY, import_stage
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+# Columnas de cabecera: sólo vienen en la primera fila de cada orden y se propagan (ffill)
+HEADER_COLS = ['partner_id', 'partner_id/name', 'company_id', 'date_order', 'invoice_date_import', 'journal_code']
+# Textos que pd.read_excel interpreta como vacíos (na_values por defecto)
+EXCEL_NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+# Formato de entrada según la extensión de file_name (cualquier otra se lee como Excel)
+FILE_FORMATS = {'.csv': 'csv', '.txt': 'csv', '.parquet': 'parquet', '.pq': 'parquet'}
+# Columnas de texto: en CSV se leen como str para no perder ceros a la izquierda ('00123')
+CSV_TEXT_COLS = [
+    'name', 'partner_id', 'partner_id/name', 'company_id', 'journal_code',
+    'default_code', 'order_line/product_id/default_code', 'order_line/product_id/name', 'order_line/tax_id',
+]
+# Valores de la columna order_line/tax_id que piden el impuesto exento
+TAX_EXEMPT_VALUES = {'exento', 'exenta', 'exempt', 'iva exento'}
+# Nombres de impuesto que se toman como exento
+TAX_EXEMPT_WORDS = ('exento', 'exempt')
+# Opciones del wizard que acepta import_sales_file
+HEADLESS_OPTIONS = (
+    'service_product_id', 'validate_invoice', 'simulate', 'cancel_all_on_errors', 'preflight', 'skip_existing',
+    'batch_create', 'chunk_savepoints', 'batch_size', 'streaming', 'parallel_workers',
+    'slow_order_threshold',
+)
+# Formatos aceptados para fechas escritas como texto: ISO o día/mes/año (nunca mes primero)
+DATE_TEXT_FORMATS = (
+    '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y/%m/%d',
+    '%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d-%m-%Y', '%d.%m.%Y',
+)
+# Errores que se muestran en el resumen del wizard; el resto queda en el registro de la importación
+ERROR_PREVIEW = 20
+# Espera máxima de un hilo de importación por un bloqueo de fila: dos hilos que se esperan entre sí
+# (uno ya en la barrera, con sus bloqueos tomados) es un bloqueo mutuo que PostgreSQL no detecta
+PARALLEL_LOCK_TIMEOUT = '30s'
+# Filas por bloque al leer CSV/Parquet en streaming
+STREAM_BLOCK_ROWS = 10000
+
+# Textos que _is_na considera vacíos (después de strip + lower)
+NA_STRINGS = ("", "nan", "none", "null")
+# Las mismas, en todas las combinaciones de mayúsculas (para comparar sin pasar por lower())
+NA_STRING_VARIANTS = {
+    ''.join(chars)
+    for word in NA_STRINGS
+    for chars in itertools.product(*[(c.lower(), c.upper()) for c in word])
+}
 
 class SaleImportWizard(models.TransientModel):
     _name = 'sale.import.wizard'
     _description = 'Importador de Ventas'
 
-    file = fields.Binary("Archivo Excel", required=True)
+    file = fields.Binary("Archivo (Excel, CSV o Parquet)")
     file_name = fields.Char("Nombre del archivo")
+    attachment_ids = fields.Many2many('ir.attachment', string="Archivo adjunto",
+        help="Alternativa a 'Archivo' para archivos grandes: se sube directo al filestore "
+             "y la importación lo lee desde ahí, sin pasar por base64.")
     service_product_id = fields.Many2one('product.product', string="Producto servicio (líneas libres)",
         domain=[('type', '=', 'service'), ('sale_ok', '=', True)])
     validate_invoice = fields.Boolean("Validar factura automáticamente")
     simulate = fields.Boolean("Simulación (no guarda)")
     cancel_all_on_errors = fields.Boolean("Cancelar todo si hay errores", default=True)
+    preflight = fields.Boolean("Validar todo antes de importar", default=True,
+        help="Con 'Cancelar todo si hay errores', valida el archivo completo (clientes, diarios, productos, "
+             "fechas y precios) antes de crear órdenes y cancela sin escribir nada si encuentra errores.")
+    batch_create = fields.Boolean("Crear órdenes en lote",
+        help="Crea varias órdenes por llamada y confirma, entrega y factura el lote completo.")
+    chunk_savepoints = fields.Boolean("Un savepoint por lote",
+        help="Importa cada lote de órdenes dentro de un único savepoint en lugar de uno por orden. "
+             "Si el lote falla se divide en mitades hasta aislar las órdenes con error.")
+    batch_size = fields.Integer("Órdenes por lote", default=50)
+    streaming = fields.Boolean("Lectura en streaming (archivos grandes)",
+        help="Lee el archivo fila a fila (Excel) o por bloques (CSV/Parquet) y procesa las órdenes por lotes, "
+             "sin cargar el archivo completo en memoria. "
+             "Las filas de cada orden deben estar contiguas.")
+    pdf_batch_size = fields.Integer("Facturas por lote de PDF", default=50,
+        help="Cantidad de facturas que se renderizan juntas al armar el zip de PDFs.")
+    run_in_background = fields.Boolean("Procesar en segundo plano",
+        help="Guarda el archivo en un trabajo que una acción planificada procesa por lotes, "
+             "confirmando cada lote. Si se interrumpe, continúa desde el último lote confirmado.")
+    parallel_workers = fields.Integer("Procesos en paralelo", default=1,
+        help="Con más de uno, las órdenes de cada lote se reparten por compañía entre hilos con su propio "
+             "cursor. Todos confirman o todos deshacen; cada lote se confirma por separado.")
+    skip_existing = fields.Boolean("Omitir órdenes ya importadas",
+        help="Saltea las órdenes cuyo nombre ya existe, así se puede volver a subir un archivo que se importó "
+             "a medias y sólo se procesan las órdenes que faltan.")
+    slow_order_threshold = fields.Float("Umbral de orden lenta (s)",
+        help="Si es mayor a cero, el resumen lista las órdenes cuya creación tardó al menos estos segundos.")
     result_summary = fields.Text("Resumen", readonly=True)
+    run_id = fields.Many2one('sale.import.run', string="Registro", readonly=True)
+    run_order_count = fields.Integer(related='run_id.order_count', string="Órdenes")
+    run_skipped_count = fields.Integer(related='run_id.skipped_count', string="Omitidas")
+    run_error_count = fields.Integer(related='run_id.error_count', string="Errores")
 
     def _is_na(self, v):
         if v is None:
             return True
         if isinstance(v, float) and math.isnan(v):
             return True
-        if isinstance(v, str) and v.strip().lower() in ("", "nan", "none", "null"):
+        if isinstance(v, str) and v.strip().lower() in NA_STRINGS:
             return True
         return False
 
@@ -70,7 +166,10 @@ class SaleImportWizard(models.TransientModel):
         s = str(v).strip()
         if not s:
             return None
+        return self._journal_code_from_text(s)
 
+    def _journal_code_from_text(self, s):
+        """Parte de _norm_journal_code para textos ya recortados y no vacíos."""
         # Aceptar formatos comunes: '15.0', '15,0', '1e1'
         s2 = s.replace(',', '.')
         try:
@@ -93,89 +192,305 @@ class SaleImportWizard(models.TransientModel):
         # Último recurso, devolver tal cual
         return s
 
-    def _find_sale_journal(self, code, company):
-        """Busca el diario de ventas por code (con y sin ceros) y, si está l10n_ar, por l10n_ar_afip_pos_number."""
-        Journal = self.env['account.journal'].with_company(company.id)
+    def _build_journal_index(self, company_ids):
+        """Carga de una vez los diarios de venta de las compañías.
+        Devuelve {company_id: {'code': {código: diario}, 'pos': {pdv_afip: diario}}}."""
+        Journal = self.env['account.journal']
+        has_pos = 'l10n_ar_afip_pos_number' in Journal._fields
+        tables = {company_id: {'code': {}, 'pos': {}} for company_id in company_ids}
+        # Respetamos el orden de búsqueda: gana el primero, igual que con limit=1
+        for journal in Journal.search([('type', '=', 'sale'), ('company_id', 'in', list(company_ids))]):
+            table = tables[journal.company_id.id]
+            table['code'].setdefault(journal.code, journal)
+            if has_pos and journal.l10n_ar_afip_pos_number:
+                table['pos'].setdefault(journal.l10n_ar_afip_pos_number, journal)
+        return tables
+
+    def _match_sale_journal(self, table, code):
+        """Busca el diario en la tabla de una compañía: por código normalizado, sin ceros a la izquierda
+        y, si está l10n_ar, por número de PDV AFIP."""
         code_norm = self._norm_journal_code(code)
 
         # Intento 1: código normalizado (00015)
-        if code_norm:
-            j = Journal.search([('type', '=', 'sale'), ('code', '=', code_norm)], limit=1)
-            if j:
-                return j
+        if code_norm and code_norm in table['code']:
+            return table['code'][code_norm]
 
         # Intento 2: sin ceros a la izquierda (15)
         if code_norm and code_norm.isdigit():
             alt = code_norm.lstrip('0') or '0'
-            j = Journal.search([('type', '=', 'sale'), ('code', '=', alt)], limit=1)
-            if j:
-                return j
+            if alt in table['code']:
+                return table['code'][alt]
 
         # Intento 3 (opcional l10n_ar): por número de PDV AFIP
-        digits = None
-        if code is not None:
-            s = str(code)
-            digits = ''.join(ch for ch in s if ch.isdigit())
-        if digits and 'l10n_ar_afip_pos_number' in Journal._fields:
-            try:
-                j = Journal.search([('type', '=', 'sale'), ('l10n_ar_afip_pos_number', '=', int(digits))], limit=1)
-                if j:
-                    return j
-            except Exception:
-                pass
+        digits = ''.join(ch for ch in str(code) if ch.isdigit()) if code is not None else None
+        if digits and int(digits) in table['pos']:
+            return table['pos'][int(digits)]
+
+        return self.env['account.journal']
+
+    def _to_object_array(self, items):
+        out = np.empty(len(items), dtype=object)
+        out[:] = items
+        return out
+
+    def _float_array_to_str(self, values):
+        """Parte vectorizada de _norm_str para floats: enteros sin '.0', decimales como str() y NaN como None."""
+        out = np.full(len(values), None, dtype=object)
+        with np.errstate(invalid='ignore'):
+            integral = np.isfinite(values) & (np.mod(values, 1) == 0)
+            small = integral & (np.abs(values) < 2 ** 63)
+        out[small] = list(map(str, values[small].astype(np.int64).tolist()))
+        rest = ~np.isnan(values) & ~integral
+        out[rest] = list(map(str, values[rest].tolist()))
+        # Enteros fuera de rango de int64: helper escalar
+        big = integral & ~small
+        out[big] = [self._norm_str(v) for v in values[big].tolist()]
+        return out
+
+    def _split_object_column(self, series):
+        """Separa una columna object por tipo de valor. Devuelve (valores, máscaras str/float/int/otros)."""
+        values = series.to_numpy(dtype=object)
+        nulls = series.isna().to_numpy()
+        if pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty') and all(
+            v is None or type(v) is float for v in values[nulls]
+        ):
+            # Caso típico: sólo textos y vacíos (None/NaN, que ambos helpers devuelven como None)
+            none = np.zeros(len(values), dtype=bool)
+            return values, ~nulls, none, none, none
+        types = series.map(type)
+        str_mask = (types == str).to_numpy()
+        float_mask = types.isin([float, np.float64]).to_numpy()
+        int_mask = (types == int).to_numpy()
+        other_mask = ~(str_mask | float_mask | int_mask | (types == type(None)).to_numpy())
+        return values, str_mask, float_mask, int_mask, other_mask
+
+    def _strip_na_strings(self, strings):
+        """strip() de cada texto; los vacíos según _is_na pasan a None."""
+        stripped = self._to_object_array(list(map(str.strip, strings)))
+        na = np.fromiter(map(NA_STRING_VARIANTS.__contains__, stripped), dtype=bool, count=len(stripped))
+        stripped[na] = None
+        return stripped
+
+    def _norm_str_series(self, series):
+        """Versión vectorizada de _norm_str (y de _norm_name, que es equivalente) para una columna entera.
+        Lo que no cae en los casos rápidos (str, float, int, None) se resuelve con el helper escalar."""
+        kind = series.dtype.kind
+        if kind in 'iub':
+            return pd.Series(list(map(str, series.tolist())), index=series.index, dtype=object)
+        if kind == 'f':
+            return pd.Series(self._float_array_to_str(series.to_numpy()), index=series.index, dtype=object)
+        if kind != 'O':
+            return series.map(self._norm_str).astype(object)
 
-        return Journal.browse(False)
+        values, str_mask, float_mask, int_mask, other_mask = self._split_object_column(series)
+        out = np.full(len(values), None, dtype=object)
+        if str_mask.any():
+            out[str_mask] = self._strip_na_strings(values[str_mask])
+        if float_mask.any():
+            out[float_mask] = self._float_array_to_str(values[float_mask].astype(float))
+        if int_mask.any():
+            out[int_mask] = list(map(str, values[int_mask]))
+        if other_mask.any():
+            out[other_mask] = [self._norm_str(v) for v in values[other_mask]]
+        return pd.Series(out, index=series.index, dtype=object)
+
+    def _norm_name_series(self, series):
+        return self._norm_str_series(series)
+
+    def _int_array_to_journal_code(self, values):
+        # str(v).zfill(5) == f"{v:05d}", también para negativos ('-0003')
+        return self._to_object_array(list(map(str.zfill, map(str, values), itertools.repeat(5))))
+
+    def _norm_journal_code_series(self, series):
+        """Versión vectorizada de _norm_journal_code. Números y textos de dígitos ('15', ' 015 ') se
+        resuelven con operaciones de columna; el resto ('15,0', 'abc16', ...), con el helper escalar."""
+        kind = series.dtype.kind
+        if kind in 'iu':
+            return pd.Series(self._int_array_to_journal_code(series.tolist()), index=series.index, dtype=object)
+        if kind == 'f':
+            values = series.to_numpy()
+            out = np.full(len(values), None, dtype=object)
+            with np.errstate(invalid='ignore'):
+                fast = np.isfinite(values) & (np.abs(values) < 2 ** 63)
+            out[fast] = self._int_array_to_journal_code(values[fast].astype(np.int64).tolist())
+            # inf / fuera de rango: helper escalar (mismo resultado o misma excepción)
+            rest = ~np.isnan(values) & ~fast
+            out[rest] = [self._norm_journal_code(v) for v in values[rest].tolist()]
+            return pd.Series(out, index=series.index, dtype=object)
+        if kind != 'O':
+            return series.map(self._norm_journal_code).astype(object)
+
+        values, str_mask, float_mask, int_mask, other_mask = self._split_object_column(series)
+        out = np.full(len(values), None, dtype=object)
+        if str_mask.any():
+            texts = self._strip_na_strings(values[str_mask])
+            present = texts != None  # noqa: E711 (comparación elemento a elemento)
+            # Sólo dígitos y hasta 15 cifras: float(s) es exacto, así que equivale a int(s)
+            candidates = texts[present]
+            digits = present.copy()
+            digits[present] = (
+                np.fromiter(map(str.isdecimal, candidates), dtype=bool, count=len(candidates))
+                & (np.fromiter(map(len, candidates), dtype=np.int64, count=len(candidates)) <= 15)
+            )
+            texts[digits] = self._int_array_to_journal_code(list(map(int, texts[digits])))
+            rest = present & ~digits
+            texts[rest] = list(map(self._journal_code_from_text, texts[rest]))
+            out[str_mask] = texts
+        numeric_mask = float_mask | int_mask | other_mask
+        if numeric_mask.any():
+            out[numeric_mask] = [self._norm_journal_code(v) for v in values[numeric_mask]]
+        return pd.Series(out, index=series.index, dtype=object)
+
+    def _find_sale_journal(self, code, company):
+        """Busca el diario de ventas por code (con y sin ceros) y, si está l10n_ar, por l10n_ar_afip_pos_number."""
+        return self._match_sale_journal(self._build_journal_index([company.id])[company.id], code)
 
     def _to_date(self, value):
-        if self._is_na(value):
+        """Fecha de una celda. Los textos (CSV, Parquet o celdas de texto en Excel) sólo se aceptan en
+        DATE_TEXT_FORMATS: ISO o día primero; pd.to_datetime leería '05/01/2024' como 1 de mayo."""
+        if self._is_na(value) or value is pd.NaT:
+            return False
+        if isinstance(value, str):
+            text = value.strip()
+            for date_format in DATE_TEXT_FORMATS:
+                try:
+                    return datetime.strptime(text, date_format).date()
+                except ValueError:
+                    continue
             return False
         try:
             return pd.to_datetime(value).date()
         except Exception:
             return False
 
+    def _resolve_ids(self, Model, keys):
+        """Separa las claves que son ids existentes de `Model` (un solo exists()).
+        Devuelve ({clave: record}, claves_pendientes)."""
+        ids = {}
+        pending = set()
+        for key in keys:
+            try:
+                ids[key] = int(key)
+            except Exception:
+                pending.add(key)
+        resolved = {}
+        if ids:
+            existing = set(Model.browse(set(ids.values())).exists().ids)
+            for key, rid in ids.items():
+                if rid in existing:
+                    resolved[key] = Model.browse(rid)
+                else:
+                    pending.add(key)
+        return resolved, pending
+
+    def _resolve_by_fields(self, Model, pending, field_names):
+        """Busca en bloque las claves pendientes por igualdad en cada campo, en orden,
+        y sólo lo que quede sin resolver por `ilike` sobre el nombre, clave por clave."""
+        names = {key: self._norm_str(key) for key in pending}
+        resolved = {}
+        for field_name in field_names:
+            remaining = {name: key for key, name in names.items() if key not in resolved}
+            if not remaining:
+                break
+            # Respetamos el orden de búsqueda: gana el primero, igual que con limit=1
+            for record in Model.search([(field_name, 'in', list(remaining))]):
+                key = remaining.get(record[field_name])
+                if key is not None:
+                    resolved.setdefault(key, record)
+        for key, name in names.items():
+            if key not in resolved:
+                resolved[key] = Model.search([('name', 'ilike', name)], limit=1)
+        return resolved
+
+    def _resolve_companies(self, keys):
+        """Resuelve cada clave de compañía (id o nombre) una sola vez. Devuelve {clave: company}."""
+        Company = self.env['res.company']
+        resolved = {key: self.env.company for key in keys if self._is_na(key)}
+        by_id, pending = self._resolve_ids(Company, [k for k in keys if k not in resolved])
+        resolved.update(by_id)
+        for key, company in self._resolve_by_fields(Company, pending, ['name']).items():
+            resolved[key] = company or self.env.company
+        return resolved
+
+    def _resolve_partners(self, keys_by_company):
+        """Resuelve los clientes (id, nombre exacto, ref, ilike) agrupados por compañía.
+        Recibe {company_id: claves} y devuelve {(company_id, clave): partner}."""
+        resolved = {}
+        for company_id, keys in keys_by_company.items():
+            Partner = self.env['res.partner'].with_company(company_id)
+            found = {key: Partner.browse(False) for key in keys if self._is_na(key)}
+            by_id, pending = self._resolve_ids(Partner, [k for k in keys if k not in found])
+            found.update(by_id)
+            found.update(self._resolve_by_fields(Partner, pending, ['name', 'ref']))
+            resolved.update({(company_id, key): partner for key, partner in found.items()})
+        return resolved
+
     def _get_company(self, name_or_id):
-        if self._is_na(name_or_id):
-            return self.env.company
-        try:
-            cid = int(name_or_id)
-            c = self.env['res.company'].browse(cid)
-            if c and c.exists():
-                return c
-        except Exception:
-            pass
-        name = self._norm_str(name_or_id)
-        c = self.env['res.company'].search([('name', '=', name)], limit=1)
-        if not c:
-            c = self.env['res.company'].search([('name', 'ilike', name)], limit=1)
-        return c or self.env.company
+        return self._resolve_companies([name_or_id])[name_or_id]
 
     def _get_partner(self, partner_name_or_id, company):
-        Partner = self.env['res.partner'].with_company(company.id)
-        if self._is_na(partner_name_or_id):
-            return Partner.browse(False)
+        return self._resolve_partners({company.id: [partner_name_or_id]})[(company.id, partner_name_or_id)]
+
+    def _build_tax_index(self, company_ids):
+        """Carga los impuestos de venta de las compañías con una sola búsqueda.
+        Devuelve {company_id: {'amounts': {monto: tax}, 'names': {nombre: tax}, 'exempt': tax}}."""
+        Tax = self.env['account.tax']
+        companies = self.env['res.company'].browse(list(company_ids))
+        # Las sucursales usan los impuestos de la compañía madre
+        taxes = Tax.search([('type_tax_use', '=', 'sale')] + Tax._check_company_domain(companies))
+        tables = {}
+        for company in companies:
+            table = tables[company.id] = {'amounts': {}, 'names': {}, 'exempt': Tax}
+            # Respetamos el orden de búsqueda: gana el primero, igual que con limit=1
+            for tax in taxes.filtered(lambda t: not t.company_id or t.company_id in company.parent_ids):
+                name = tax.name.strip().lower()
+                if tax.amount_type == 'percent':
+                    table['amounts'].setdefault(round(tax.amount, 4), tax)
+                table['names'].setdefault(name, tax)
+                if not table['exempt'] and any(word in name for word in TAX_EXEMPT_WORDS):
+                    table['exempt'] = tax
+        return tables
+
+    def _norm_tax_key(self, value):
+        """Clave de búsqueda de la columna de impuesto: 'exempt', un monto (10.5) o el nombre en minúsculas.
+        None si la celda está vacía (se usa el IVA 21%). Un número entre 0 y 1 sin '%' es una fracción,
+        venga de una celda numérica o de texto: Excel guarda las celdas con formato porcentaje así (10,5% -> 0.105)."""
+        if self._is_na(value):
+            return None
+        if isinstance(value, str):
+            text = value.strip().lower()
+            if text in TAX_EXEMPT_VALUES:
+                return 'exempt'
+            number = text.removeprefix('iva').strip()
+            percent = number.endswith('%')
+            number = number.removesuffix('%').strip().replace(',', '.')
+        else:
+            # Celdas de otro tipo (p. ej. con formato fecha) no coinciden con ningún impuesto
+            text = str(value).strip().lower()
+            number = value
+            percent = False
         try:
-            pid = int(partner_name_or_id)
-            p = Partner.browse(pid)
-            if p and p.exists():
-                return p
-        except Exception:
-            pass
-        name = self._norm_str(partner_name_or_id)
-        p = Partner.search([('name', '=', name)], limit=1)
-        if not p:
-            p = Partner.search([('ref', '=', name)], limit=1)
-        if not p:
-            p = Partner.search([('name', 'ilike', name)], limit=1)
-        return p
-
-    def _get_tax_iva_21_sale(self, company):
-        domain = [('type_tax_use', '=', 'sale'), ('amount', '=', 21.0), ('company_id', 'in', [company.id, False])]
-        Tax = self.env['account.tax'].with_company(company.id)
-        t = Tax.search(domain, limit=1)
-        if not t:
-            t = Tax.search([('type_tax_use', '=', 'sale'), ('name', 'in', ['21%', 'IVA 21%'])], limit=1)
-        return t
+            amount = float(number)
+        except (TypeError, ValueError):
+            return text
+        if not percent and 0 < amount < 1:
+            amount *= 100
+        return round(amount, 4)
+
+    def _row_tax_key(self, row):
+        return self._norm_tax_key(row.get('order_line/tax_id'))
+
+    def _lookup_tax(self, index, company, tax_key=None):
+        """Impuesto de venta de la compañía según la clave de _norm_tax_key (None: IVA 21%)."""
+        table = index['taxes'][company.id]
+        if tax_key is None:
+            return table['amounts'].get(21.0) or table['names'].get('21%') or table['names'].get('iva 21%') \
+                or self.env['account.tax']
+        if tax_key == 'exempt':
+            return table['exempt'] or table['amounts'].get(0.0) or self.env['account.tax']
+        if isinstance(tax_key, float):
+            return table['amounts'].get(tax_key) or self.env['account.tax']
+        return table['names'].get(tax_key) or self.env['account.tax']
 
     def _price_for_product(self, product, qty, partner):
         try:
@@ -188,6 +503,220 @@ class SaleImportWizard(models.TransientModel):
             pass
         return product.lst_price
 
+    def _build_price_index(self, grouped_orders, index):
+        """Precalcula el precio de lista de las líneas de producto sin price_unit: una llamada
+        _get_products_price por (tarifa, cantidad, compañía). Devuelve {(pricelist_id, product_id, qty, company_id): precio}
+        omitiendo lo que ya esté en index['prices']."""
+        requests = {}
+        for order_name, lines in grouped_orders.items():
+            company = index['companies'][order_name]
+            partner = self._lookup_partner(index, company, lines[0].get('__partner_name__'))
+            if not partner:
+                continue
+            pricelist = partner.property_product_pricelist
+            for row in lines:
+                if self._row_price_unit(row) is not None:
+                    continue
+                product = index['products'].get((company.id, self._row_default_code(row)))
+                if not product:
+                    continue
+                qty = self._row_qty(row)
+                if (pricelist.id, product.id, qty, company.id) not in index['prices']:
+                    requests.setdefault((pricelist.id, qty, company.id), set()).add(product.id)
+
+        prices = {}
+        for (pricelist_id, qty, company_id), product_ids in requests.items():
+            products = self.env['product.product'].with_company(company_id).browse(product_ids)
+            pricelist = self.env['product.pricelist'].with_company(company_id).browse(pricelist_id)
+            group_prices = {}
+            if pricelist:
+                try:
+                    group_prices = pricelist._get_products_price(products, qty)
+                except Exception as e:
+                    _logger.warning("No se pudo calcular la tarifa %s para %s productos: %s", pricelist.display_name, len(products), e)
+            for product in products:
+                price = group_prices.get(product.id)
+                # Una tarifa sin compañía puede dar precios distintos en cada compañía (p. ej. reglas sobre costo)
+                prices[(pricelist_id, product.id, qty, company_id)] = product.lst_price if price is None else price
+        return prices
+
+    def _to_number(self, value):
+        """Número de una celda numérica o de texto. En el texto el último separador es el decimal
+        ('2,5', '1.234,56', '1,234.56'); una coma sola siempre es decimal. None si no es un número."""
+        if isinstance(value, str):
+            text = value.strip().replace(' ', '')
+            if ',' in text and '.' in text:
+                if text.rfind(',') > text.rfind('.'):
+                    text = text.replace('.', '').replace(',', '.')
+                else:
+                    text = text.replace(',', '')
+            else:
+                text = text.replace(',', '.')
+            value = text
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _row_number_errors(self, row):
+        """Celdas de cantidad o precio con algo que no es un número (antes se tomaban como 1 o sin precio)."""
+        errors = []
+        for column, label in (('order_line/product_uom_qty', "Cantidad inválida"), ('order_line/price_unit', "Precio inválido")):
+            value = row.get(column)
+            if not self._is_na(value) and self._to_number(value) is None:
+                errors.append(f"{label} en {column}: {value}")
+        return errors
+
+    def _row_qty(self, row):
+        qty = row.get('order_line/product_uom_qty') or 1.0
+        if self._is_na(qty):
+            return 1.0
+        number = self._to_number(qty)
+        # Las celdas inválidas las informa _row_number_errors
+        return number if number is not None else 1.0
+
+    def _row_price_unit(self, row):
+        price_unit = row.get('order_line/price_unit')
+        if self._is_na(price_unit):
+            return None
+        return self._to_number(price_unit)
+
+    def _row_default_code(self, row):
+        if '__default_code__' in row:
+            return row['__default_code__']
+        return self._norm_str(row.get('default_code') or row.get('order_line/product_id/default_code'))
+
+    def _build_product_index(self, grouped_orders, companies, known_keys=()):
+        """Resuelve los productos de la planilla con una búsqueda por compañía.
+        Devuelve {(company_id, default_code): product}; omite las claves de `known_keys`."""
+        codes_by_company = {}
+        for order_name, lines in grouped_orders.items():
+            company = companies[order_name]
+            codes = codes_by_company.setdefault(company.id, set())
+            for row in lines:
+                default_code = self._row_default_code(row)
+                if default_code and (company.id, default_code) not in known_keys:
+                    codes.add(default_code)
+
+        products = {}
+        for company_id, codes in codes_by_company.items():
+            if not codes:
+                continue
+            Product = self.env['product.product'].with_company(company_id)
+            found = Product.search([
+                ('default_code', 'in', list(codes)),
+                '|', ('company_id', '=', company_id), ('company_id', '=', False),
+            ])
+            # Respetamos el orden de búsqueda: gana el primero, igual que con limit=1
+            for product in found:
+                products.setdefault((company_id, product.default_code), product)
+        return products
+
+    def _build_import_index(self, grouped_orders, index=None):
+        """Resuelve por adelantado las entidades que referencia la planilla.
+        Lo comparten la simulación y la importación real. Si se pasa `index` (lectura por
+        lotes) sólo se consultan las claves nuevas y se reutiliza lo ya resuelto."""
+        if index is None:
+            index = {
+                'company_keys': {},
+                'partners': {},
+                'journal_tables': {},
+                'journals': {},
+                'products': {},
+                'product_keys': set(),
+                'prices': {},
+                'taxes': {},
+                'stats': {'product_hit': 0, 'product_miss': 0},
+                # Órdenes creadas (incluye las de savepoints deshechos: ver _created_orders)
+                'created_order_ids': [],
+            }
+
+        company_keys = {lines[0].get('__company_name__') for lines in grouped_orders.values()}
+        company_keys -= index['company_keys'].keys()
+        if company_keys:
+            index['company_keys'].update(self._resolve_companies(company_keys))
+        companies = {
+            order_name: index['company_keys'][lines[0].get('__company_name__')]
+            for order_name, lines in grouped_orders.items()
+        }
+        # Sólo las órdenes del lote actual: la memoria no crece con el archivo
+        index['companies'] = companies
+
+        partner_keys = {}
+        for order_name, lines in grouped_orders.items():
+            company_id = companies[order_name].id
+            partner_key = lines[0].get('__partner_name__')
+            if (company_id, partner_key) not in index['partners']:
+                partner_keys.setdefault(company_id, set()).add(partner_key)
+        if partner_keys:
+            index['partners'].update(self._resolve_partners(partner_keys))
+
+        new_company_ids = {company.id for company in companies.values()} - index['journal_tables'].keys()
+        if new_company_ids:
+            index['journal_tables'].update(self._build_journal_index(new_company_ids))
+            index['taxes'].update(self._build_tax_index(new_company_ids))
+        for order_name, lines in grouped_orders.items():
+            company_id = companies[order_name].id
+            journal_code = lines[0].get('__journal_code__')
+            if journal_code and (company_id, journal_code) not in index['journals']:
+                index['journals'][(company_id, journal_code)] = self._match_sale_journal(
+                    index['journal_tables'][company_id], journal_code)
+
+        products = self._build_product_index(grouped_orders, companies, index['product_keys'])
+        index['products'].update(products)
+        for order_name, lines in grouped_orders.items():
+            company_id = companies[order_name].id
+            index['product_keys'].update(
+                (company_id, code) for code in map(self._row_default_code, lines) if code
+            )
+
+        index['prices'].update(self._build_price_index(grouped_orders, index))
+        return index
+
+    def _lookup_partner(self, index, company, partner_key):
+        return index['partners'][(company.id, partner_key)]
+
+    def _lookup_price(self, index, company, product, qty, partner):
+        key = (partner.property_product_pricelist.id, product.id, qty, company.id)
+        if key not in index['prices']:
+            index['prices'][key] = self.with_company(company)._price_for_product(product.with_company(company), qty, partner)
+        return index['prices'][key]
+
+    def _lookup_journal(self, index, company, journal_code):
+        return index['journals'].get((company.id, journal_code)) or self.env['account.journal']
+
+    def _lookup_product(self, index, company, default_code):
+        product = index['products'].get((company.id, default_code))
+        if product:
+            index['stats']['product_hit'] += 1
+            return product
+        index['stats']['product_miss'] += 1
+        return self.env['product.product']
+
+    def _journal_not_found_message(self, journal_code):
+        return f"No se encontró diario con código '{journal_code}' (normalizado: '{self._norm_journal_code(journal_code)}')."
+
+    def _index_summary(self, index):
+        stats = index['stats']
+        partners = index['partners']
+        return [
+            f"Clientes: {len([p for p in partners.values() if p])} de {len(partners)} claves resueltas.",
+            f"Diarios: {len([j for j in index['journals'].values() if j])} de {len(index['journals'])} códigos resueltos.",
+            f"Productos: {len(index['products'])} códigos resueltos, "
+            f"{stats['product_hit']} aciertos / {stats['product_miss']} no encontrados.",
+            f"Impuestos de venta: {sum(len(t['names']) for t in index['taxes'].values())} cargados "
+            f"de {len(index['taxes'])} compañías.",
+        ]
+
+    def _action_reopen(self):
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": "sale.import.wizard",
+            "view_mode": "form",
+            "res_id": self.id,
+            "target": "new",
+        }
+
     def _get_invoice_report_action(self):
         candidates = [
             'account.account_invoices',
@@ -205,41 +734,365 @@ class SaleImportWizard(models.TransientModel):
             "No se encontró un reporte de facturas válido (%s)." % " / ".join(candidates)
         )
 
-    def action_import_sales(self):
-        self.ensure_one()
-        if not self.file:
-            return
+    def _iter_invoice_pdfs(self, report, invoices):
+        """Renderiza las facturas por lotes de `pdf_batch_size`: un único render (un wkhtmltopdf) por lote,
+        separado luego por documento. Cede (factura, pdf) a medida que termina cada lote."""
+        batch_size = max(self.pdf_batch_size, 1)
+        for start in range(0, len(invoices), batch_size):
+            batch = invoices[start:start + batch_size]
+            streams = report._render_qweb_pdf_prepare_streams(report.report_name, None, res_ids=batch.ids)
+            for inv in batch:
+                stream = streams.get(inv.id, {}).get('stream')
+                if stream:
+                    pdf = stream.getvalue()
+                    stream.close()
+                else:
+                    # Odoo no pudo separar el PDF del lote por documento: se renderiza individualmente
+                    pdf, _ = report._render_qweb_pdf(report.report_name, res_ids=inv.ids)
+                yield inv, pdf
+
+    def _create_attachment_from_path(self, path, vals):
+        """Crea un ir.attachment con el contenido de `path` sin cargarlo en memoria ni pasar por base64.
+        Con almacenamiento en filestore el archivo se mueve tal cual a su ubicación definitiva."""
+        Attachment = self.env['ir.attachment']
+        if Attachment._storage() != 'file':
+            with open(path, 'rb') as f:
+                return Attachment.create(dict(vals, raw=f.read()))
+
+        sha = hashlib.sha1()
+        size = 0
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+                size += len(block)
+        checksum = sha.hexdigest()
+        fname = f"{checksum[:2]}/{checksum}"
+        full_path = Attachment._full_path(fname)
+        if os.path.exists(full_path):
+            os.unlink(path)
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            shutil.move(path, full_path)
+        # Si la transacción se deshace, el garbage collector del filestore lo elimina
+        Attachment._mark_for_gc(fname)
+
+        # create/write ignoran store_fname/file_size/checksum: los completamos directamente
+        attachment = Attachment.create(vals)
+        self.env.cr.execute(
+            "UPDATE ir_attachment SET store_fname = %s, file_size = %s, checksum = %s WHERE id = %s",
+            (fname, size, checksum, attachment.id),
+        )
+        attachment.invalidate_recordset(['store_fname', 'file_size', 'checksum', 'raw', 'datas'])
+        return attachment
+
+    def _export_invoices_zip(self, report, invoices):
+        """Arma el zip de PDFs en un archivo temporal (escribiendo cada PDF apenas se renderiza)
+        y lo guarda como adjunto sin mantener el archivo completo en memoria."""
+        Attachment = self.env['ir.attachment']
+        tmp_dir = None
+        if Attachment._storage() == 'file':
+            # En el mismo filesystem que el filestore, así el move final es un rename
+            tmp_dir = Attachment._filestore()
+            os.makedirs(tmp_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix='invoices-', suffix='.zip', dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f, zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as zf:
+                for inv, pdf in self._iter_invoice_pdfs(report, invoices):
+                    pdf_name = inv._get_report_base_filename() + '.pdf'
+                    zf.writestr(pdf_name, pdf)
+            return self._create_attachment_from_path(path, {
+                'name': 'invoices.zip',
+                'type': 'binary',
+                'mimetype': 'application/zip',
+            })
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def _collect_order_vals(self, order_name, lines, index):
+        """Arma los valores de la orden desde sus filas de planilla usando sólo el índice.
+        Devuelve (order_vals, journal_code, errores); order_vals es None si hay errores."""
+        order_errors = []
+        first = lines[0]
+        company = index['companies'][order_name]
+        partner = self._lookup_partner(index, company, first.get('__partner_name__'))
+        if not partner:
+            order_errors.append(f"Cliente no encontrado por nombre/ref: {first.get('__partner_name__')}")
+
+        journal_code = first.get('__journal_code__')
+        if journal_code and not self._lookup_journal(index, company, journal_code):
+            order_errors.append(self._journal_not_found_message(journal_code))
+
+        dates = {}
+        for column in ('date_order', 'invoice_date_import'):
+            value = first.get(column)
+            dates[column] = self._to_date(value)
+            if not dates[column] and not self._is_na(value) and value is not pd.NaT:
+                order_errors.append(f"Fecha inválida en {column}: {value} (usar AAAA-MM-DD o DD/MM/AAAA)")
+
+        order_lines = []
+
+        for row in lines:
+            number_errors = self._row_number_errors(row)
+            if number_errors:
+                order_errors.extend(number_errors)
+                continue
+            qty = self._row_qty(row)
+            price_unit = self._row_price_unit(row)
+            default_code = self._row_default_code(row)
+            desc = self._norm_str(row.get('order_line/product_id/name'))
+            tax_key = self._row_tax_key(row)
+            tax = self._lookup_tax(index, company, tax_key)
+            if tax_key is not None and not tax:
+                order_errors.append(f"Impuesto de venta no encontrado: {row.get('order_line/tax_id')}")
+                continue
+
+            if default_code:
+                product = self._lookup_product(index, company, default_code)
+                if not product:
+                    order_errors.append(f"Producto no encontrado - código: {default_code}")
+                    continue
+                line_vals = {'product_id': product.id, 'product_uom_qty': qty}
+                if price_unit is not None:
+                    line_vals['price_unit'] = price_unit
+                elif partner:
+                    line_vals['price_unit'] = self._lookup_price(index, company, product, qty, partner)
+                if tax_key is not None:
+                    # Con columna de impuesto se reemplazan los impuestos del producto
+                    line_vals['tax_id'] = [(6, 0, tax.ids)]
+            else:
+                if not self.service_product_id:
+                    order_errors.append("Línea sin default_code requiere 'Producto servicio (líneas libres)'.")
+                    continue
+                if not desc:
+                    order_errors.append("Línea personalizada sin descripción.")
+                    continue
+                if price_unit is None:
+                    order_errors.append("Línea personalizada sin price_unit.")
+                    continue
+                line_vals = {
+                    'product_id': self.service_product_id.id,
+                    'name': desc,
+                    'product_uom_qty': qty,
+                    'price_unit': price_unit,
+                    'tax_id': [(6, 0, tax.ids)],
+                }
+            order_lines.append((0, 0, line_vals))
+
+        if not order_lines and not order_errors:
+            order_errors.append("No se agregaron líneas válidas.")
+
+        if order_errors:
+            return None, journal_code, order_errors
+
+        order_vals = {
+            'name': str(order_name),
+            'partner_id': partner.id,
+            'company_id': company.id,
+            'date_order': dates['date_order'],
+            'invoice_date_import': dates['invoice_date_import'],
+            'order_line': order_lines,
+        }
+        return order_vals, journal_code, order_errors
+
+    def _prepare_order_vals(self, order_name, lines, index):
+        """Arma los valores de la orden desde sus filas de planilla. Devuelve (order_vals, journal_code)
+        o levanta UserError con todos los problemas encontrados en la orden."""
+        order_vals, journal_code, order_errors = self._collect_order_vals(order_name, lines, index)
+        if order_errors:
+            raise UserError("\n- ".join([f"{order_name}: {msg}" for msg in order_errors]))
+        return order_vals, journal_code
 
-        data = base64.b64decode(self.file)
-        df = pd.read_excel(BytesIO(data))
+    def _create_import_orders(self, prepared, index):
+        """Crea con un único create las órdenes preparadas [(order_name, order_vals, journal_code)]
+        y asigna el diario a sus facturas. Devuelve las facturas borrador."""
+        start = time.perf_counter()
+        sale_orders = self.env['sale.order'].with_context(auto_invoice_on_import=True).create(
+            [order_vals for _order_name, order_vals, _journal_code in prepared]
+        )
+        profiler = self.env.context.get(PROFILER_CONTEXT_KEY)
+        if profiler:
+            # Con creación en lote se reparte el tiempo del create entre sus órdenes
+            elapsed = (time.perf_counter() - start) / len(prepared)
+            for order_name, _order_vals, _journal_code in prepared:
+                profiler.add_order_time(order_name, elapsed)
+        index['created_order_ids'].extend(sale_orders.ids)
+        invoices = self.env['account.move']
+        for (order_name, _order_vals, journal_code), sale_order in zip(prepared, sale_orders):
+            company = index['companies'][order_name]
+            # El diario ya se validó al preparar la orden
+            journal = self._lookup_journal(index, company, journal_code) if journal_code else None
+            for invoice in sale_order.invoice_ids:
+                if journal:
+                    invoice.journal_id = journal.id
+                invoices |= invoice
+        return invoices
+
+    def _import_order(self, order_name, lines, index, errors):
+        """Importa una orden en su propio savepoint. Devuelve sus facturas (vacío si falló)."""
+        try:
+            with self.env.cr.savepoint():
+                order_vals, journal_code = self._prepare_order_vals(order_name, lines, index)
+                return self._create_import_orders([(order_name, order_vals, journal_code)], index)
+        except UserError as e:
+            errors.append(str(e))
+            if self.cancel_all_on_errors:
+                raise
+        except Exception as e:
+            errors.append(f"{order_name}: {str(e)}")
+            if self.cancel_all_on_errors:
+                raise
+        return self.env['account.move']
+
+    def _create_prepared_orders(self, prepared, index):
+        """Crea las órdenes preparadas: con un único create si se pidió crear en lote, si no orden por orden."""
+        if self.batch_create:
+            return self._create_import_orders(prepared, index)
+        invoices = self.env['account.move']
+        for item in prepared:
+            invoices |= self._create_import_orders([item], index)
+        return invoices
 
-        if 'name' not in df.columns:
+    def _create_bisected(self, prepared, lines_by_order, index, errors):
+        """Crea las órdenes preparadas en un único savepoint. Si falla, divide el lote en mitades
+        hasta aislar las órdenes con error: las demás se importan igual."""
+        if len(prepared) == 1:
+            order_name = prepared[0][0]
+            return self._import_order(order_name, lines_by_order[order_name], index, errors)
+        try:
+            with self.env.cr.savepoint():
+                return self._create_prepared_orders(prepared, index)
+        except Exception:
+            middle = len(prepared) // 2
+            invoices = self._create_bisected(prepared[:middle], lines_by_order, index, errors)
+            return invoices | self._create_bisected(prepared[middle:], lines_by_order, index, errors)
+
+    def _import_order_batch(self, batch, index, errors):
+        """Importa un lote [(order_name, lines)] en un único savepoint (y un único create si se pidió
+        crear en lote). Si el lote falla se bisecta, así cada error queda asociado a su orden."""
+        prepared = []
+        for order_name, lines in batch:
+            try:
+                prepared.append((order_name, *self._prepare_order_vals(order_name, lines, index)))
+            except UserError as e:
+                errors.append(str(e))
+                if self.cancel_all_on_errors:
+                    raise
+        if not prepared:
+            return self.env['account.move']
+        return self._create_bisected(prepared, dict(batch), index, errors)
+
+    def _check_columns(self, columns):
+        if 'name' not in columns:
             raise UserError("La planilla debe incluir una columna 'name' para identificar las órdenes.")
-        df['name'] = df['name'].apply(self._norm_name)
+
+    def _data_source(self, data):
+        """Lo que reciben los lectores: `data` son los bytes del archivo o la ruta de un archivo
+        (p. ej. el del adjunto en el filestore), que se lee sin cargarlo en memoria."""
+        return BytesIO(data) if isinstance(data, bytes) else data
+
+    def _read_head(self, data, size):
+        if isinstance(data, bytes):
+            return data[:size]
+        with open(data, 'rb') as f:
+            return f.read(size)
+
+    def _get_attachment_data(self, attachment):
+        """Contenido de un adjunto para importar: la ruta en el filestore si está ahí, si no sus bytes."""
+        if attachment.store_fname:
+            path = attachment._full_path(attachment.store_fname)
+            if os.path.isfile(path):
+                return path
+        return attachment.raw
+
+    def _get_import_data(self):
+        """Archivo a importar: el adjunto subido (leído desde el filestore) o el campo binario."""
+        if self.attachment_ids:
+            return self._get_attachment_data(self.attachment_ids[0])
+        return base64.b64decode(self.file)
+
+    def _get_file_format(self):
+        """'excel', 'csv' o 'parquet' según la extensión del nombre del archivo."""
+        extension = os.path.splitext(self.file_name or '')[1].lower()
+        return FILE_FORMATS.get(extension, 'excel')
+
+    def _check_parquet_support(self):
+        if pq is None:
+            raise UserError("Para importar archivos Parquet hay que instalar la librería 'pyarrow' en el servidor.")
+
+    def _csv_read_options(self, data):
+        """Separador y codificación del CSV, detectados sobre el comienzo del archivo."""
+        sample = self._read_head(data, 65536)
+        try:
+            text = codecs.getincrementaldecoder('utf-8-sig')().decode(sample, final=False)
+            encoding = 'utf-8-sig'
+        except UnicodeDecodeError:
+            text = sample.decode('latin-1')
+            encoding = 'latin-1'
+        try:
+            sep = csv.Sniffer().sniff(text.split('\n', 1)[0], delimiters=',;\t|').delimiter
+        except csv.Error:
+            sep = ','
+        options = {
+            'sep': sep,
+            'encoding': encoding,
+            'dtype': {col: str for col in CSV_TEXT_COLS},
+        }
+        if sep == ';':
+            # Exportación regional (Excel en español): coma decimal y punto de miles, '1.234,56'
+            options.update(decimal=',', thousands='.')
+        return options
+
+    def _read_dataframe(self, data):
+        file_format = self._get_file_format()
+        if file_format == 'csv':
+            return pd.read_csv(self._data_source(data), **self._csv_read_options(data))
+        if file_format == 'parquet':
+            self._check_parquet_support()
+            # Sin los metadatos de pandas: los textos vuelven como object con None en lugar de pd.NA
+            return pq.read_table(self._data_source(data)).to_pandas(ignore_metadata=True)
+        return pd.read_excel(self._data_source(data))
+
+    def _load_grouped_orders(self, data):
+        """Lee el archivo completo con pandas y lo agrupa por orden: {order_name: [filas]}."""
+        df = self._read_dataframe(data)
+
+        self._check_columns(df.columns)
+        df['name'] = self._norm_name_series(df['name'])
         df['name'] = df['name'].ffill()
 
-        header_cols = ['partner_id', 'partner_id/name', 'company_id', 'date_order', 'invoice_date_import', 'journal_code']
-        for col in header_cols:
+        for col in HEADER_COLS:
             if col in df.columns:
                 df[col] = df[col].ffill()
 
         if 'partner_id/name' in df.columns:
-            df['__partner_name__'] = df['partner_id/name'].apply(self._norm_str)
+            df['__partner_name__'] = self._norm_str_series(df['partner_id/name'])
         elif 'partner_id' in df.columns:
-            df['__partner_name__'] = df['partner_id'].apply(self._norm_str)
+            df['__partner_name__'] = self._norm_str_series(df['partner_id'])
         else:
             df['__partner_name__'] = None
 
         if 'company_id' in df.columns:
-            df['__company_name__'] = df['company_id'].apply(self._norm_str)
+            df['__company_name__'] = self._norm_str_series(df['company_id'])
         else:
             df['__company_name__'] = None
 
         if 'journal_code' in df.columns:
-            df['__journal_code__'] = df['journal_code'].apply(self._norm_journal_code)
+            df['__journal_code__'] = self._norm_journal_code_series(df['journal_code'])
         else:
             df['__journal_code__'] = None
 
+        # default_code normalizado una sola vez (antes se recalculaba en cada consulta de la fila)
+        code_cols = [col for col in ('default_code', 'order_line/product_id/default_code') if col in df.columns]
+        if len(code_cols) == 2:
+            # Misma semántica que `a or b`: NaN es verdadero, así que sólo se usa b si a es falsy
+            raw_codes = df[code_cols[0]].where(df[code_cols[0]].map(bool), df[code_cols[1]])
+            df['__default_code__'] = self._norm_str_series(raw_codes)
+        elif code_cols:
+            df['__default_code__'] = self._norm_str_series(df[code_cols[0]])
+        else:
+            df['__default_code__'] = None
+
         if 'order_line/product_uom_qty' in df.columns:
             df['order_line/product_uom_qty'] = df['order_line/product_uom_qty'].fillna(1.0)
         if 'order_line/price_unit' in df.columns:
@@ -251,200 +1104,787 @@ class SaleImportWizard(models.TransientModel):
             if not order_name:
                 continue
             grouped_orders.setdefault(order_name, []).append(rec)
+        return grouped_orders
 
-        errors = []
-        summary = [f"Órdenes detectadas: {len(grouped_orders)}"]
-        for order, lines in grouped_orders.items():
-            summary.append(f"- {order}: {len(lines)} líneas")
+    def _open_excel_rows(self, data):
+        """Abre la primera hoja en modo read-only. Devuelve (columnas, iterador de filas como dict).
+        Igual que pd.read_excel: textos tipo 'NA'/'NULL' cuentan como vacíos y se descartan
+        las filas vacías del final."""
+        wb = openpyxl.load_workbook(self._data_source(data), read_only=True, data_only=True)
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        columns = [f"Unnamed: {i}" if c is None else str(c) for i, c in enumerate(header)]
+
+        def iter_rows():
+            try:
+                blank_rows = 0
+                for values in rows:
+                    values = [None if isinstance(v, str) and v in EXCEL_NA_VALUES else v for v in values]
+                    if all(v is None for v in values):
+                        blank_rows += 1
+                        continue
+                    # Las filas vacías intermedias se conservan (pandas las lee como NaN)
+                    for _i in range(blank_rows):
+                        yield dict.fromkeys(columns)
+                    blank_rows = 0
+                    yield dict(zip(columns, values))
+            finally:
+                wb.close()
+
+        return columns, iter_rows()
+
+    def _open_csv_rows(self, data):
+        """Lee el CSV por bloques de STREAM_BLOCK_ROWS filas. Devuelve (columnas, iterador de filas como dict)."""
+        reader = pd.read_csv(self._data_source(data), chunksize=STREAM_BLOCK_ROWS, **self._csv_read_options(data))
+        first = next(reader, None)
+        if first is None:
+            return [], iter(())
+        columns = list(first.columns)
+
+        def iter_rows():
+            with reader:
+                for block in itertools.chain([first], reader):
+                    yield from block.to_dict('records')
+
+        return columns, iter_rows()
+
+    def _open_parquet_rows(self, data):
+        """Lee el Parquet por lotes de registros. Devuelve (columnas, iterador de filas como dict)."""
+        self._check_parquet_support()
+        parquet_file = pq.ParquetFile(self._data_source(data))
+        columns = parquet_file.schema_arrow.names
+
+        def iter_rows():
+            for batch in parquet_file.iter_batches(batch_size=STREAM_BLOCK_ROWS):
+                yield from batch.to_pylist()
+
+        return columns, iter_rows()
+
+    def _open_rows(self, data):
+        file_format = self._get_file_format()
+        if file_format == 'csv':
+            return self._open_csv_rows(data)
+        if file_format == 'parquet':
+            return self._open_parquet_rows(data)
+        return self._open_excel_rows(data)
+
+    def _iter_streamed_orders(self, columns, rows):
+        """Aplica fila a fila el mismo ffill y normalización que _load_grouped_orders y cede
+        (order_name, filas) en cuanto cambia `name`: la memoria queda acotada por la orden más grande."""
+        partner_col = 'partner_id/name' if 'partner_id/name' in columns else (
+            'partner_id' if 'partner_id' in columns else None)
+        ffill_cols = [col for col in HEADER_COLS if col in columns]
+        has_qty = 'order_line/product_uom_qty' in columns
+        has_price = 'order_line/price_unit' in columns
+
+        last = {}
+        done = set()
+        current_name, current_lines = None, []
+        for row in rows:
+            order_name = self._norm_name(row.get('name'))
+            if order_name is None:
+                order_name = last.get('name')
+            else:
+                last['name'] = order_name
+            for col in ffill_cols:
+                if self._is_missing(row.get(col)):
+                    row[col] = last.get(col)
+                else:
+                    last[col] = row[col]
+            if not order_name:
+                continue
+
+            row['name'] = order_name
+            row['__partner_name__'] = self._norm_str(row.get(partner_col)) if partner_col else None
+            row['__company_name__'] = self._norm_str(row.get('company_id')) if 'company_id' in columns else None
+            row['__journal_code__'] = self._norm_journal_code(row.get('journal_code')) if 'journal_code' in columns else None
+            row['__default_code__'] = self._norm_str(row.get('default_code') or row.get('order_line/product_id/default_code'))
+            if has_qty and self._is_missing(row.get('order_line/product_uom_qty')):
+                row['order_line/product_uom_qty'] = 1.0
+            if has_price and self._is_missing(row.get('order_line/price_unit')):
+                row['order_line/price_unit'] = 0.0
+
+            if order_name != current_name:
+                if current_lines:
+                    yield current_name, current_lines
+                    done.add(current_name)
+                if order_name in done:
+                    raise UserError(
+                        f"La orden {order_name} aparece en filas no contiguas: ordená la planilla por 'name' "
+                        "o desactivá la lectura en streaming."
+                    )
+                current_name, current_lines = order_name, []
+            current_lines.append(row)
+        if current_lines:
+            yield current_name, current_lines
+
+    def _is_missing(self, v):
+        """NaN/None en el sentido de pandas (lo que rellenan ffill y fillna)."""
+        return v is None or (isinstance(v, float) and math.isnan(v))
+
+    def _iter_order_chunks(self, data):
+        """Devuelve un iterador de lotes {order_name: [filas]}.
+        En modo streaming cada lote tiene a lo sumo `batch_size` órdenes; si no, hay un único lote."""
+        if not self.streaming:
+            return iter([self._load_grouped_orders(data)])
+
+        columns, rows = self._open_rows(data)
+        self._check_columns(columns)
+        chunk_size = max(self.batch_size, 1)
+
+        def iter_chunks():
+            chunk = {}
+            for order_name, lines in self._iter_streamed_orders(columns, rows):
+                chunk[order_name] = lines
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = {}
+            if chunk:
+                yield chunk
+
+        return iter_chunks()
+
+    def _iter_profiled_chunks(self, data):
+        """_iter_order_chunks midiendo la lectura de la planilla como una etapa propia."""
+        chunks = iter(self._iter_order_chunks(data))
+        while True:
+            with import_stage(self.env, "lectura de planilla") as stats:
+                grouped_orders = next(chunks, None)
+                if stats is not None and grouped_orders:
+                    stats['rows'] += sum(len(lines) for lines in grouped_orders.values())
+            if grouped_orders is None:
+                return
+            yield grouped_orders
+
+    def _simulate_order(self, order_name, lines, index):
+        """Errores que tendría la orden al importarla (sin escribir nada ni consultar por orden)."""
+        _order_vals, _journal_code, order_errors = self._collect_order_vals(order_name, lines, index)
+        return [f"{order_name}: {msg}" for msg in dict.fromkeys(order_errors)]
+
+    def _skip_existing_orders(self, grouped_orders):
+        """Separa las órdenes cuyo nombre ya existe (una sola búsqueda por lote).
+        Devuelve ({order_name: [filas]} pendientes, nombres omitidos)."""
+        names = [str(order_name) for order_name in grouped_orders]
+        existing = {
+            order['name']
+            for order in self.env['sale.order'].search_read([('name', 'in', names)], ['name'])
+        }
+        if not existing:
+            return grouped_orders, []
+        pending = {name: lines for name, lines in grouped_orders.items() if str(name) not in existing}
+        return pending, [name for name in grouped_orders if str(name) in existing]
+
+    def _log_lines(self, stage, severity, items):
+        """Agrega al registro de la importación (si hay uno) las líneas [(order_name, mensaje)]."""
+        if self.run_id and items:
+            self.run_id._add_lines([
+                {'order_name': order_name, 'severity': severity, 'stage': stage, 'message': message}
+                for order_name, message in items
+            ])
+
+    def _log_orders(self, stage, grouped_orders):
+        self._log_lines(stage, 'info', [
+            (str(order_name), f"{len(lines)} líneas") for order_name, lines in grouped_orders.items()
+        ])
+
+    def _log_errors(self, stage, errors):
+        """Registra los errores ("orden: mensaje") separando la orden del mensaje."""
+        items = []
+        for error in errors:
+            order_name, sep, message = error.partition(': ')
+            if not sep or '\n' in order_name:
+                order_name, message = False, error
+            items.append((order_name, message))
+        self._log_lines(stage, 'error', items)
+
+    def _iter_pending_orders(self, data, skipped):
+        """Lotes a procesar: con 'Omitir órdenes ya importadas' quita las existentes
+        (agregándolas a `skipped`) y descarta los lotes que quedan vacíos."""
+        for grouped_orders in self._iter_profiled_chunks(data):
+            if self.skip_existing:
+                grouped_orders, skipped_names = self._skip_existing_orders(grouped_orders)
+                skipped.extend(skipped_names)
+                self._log_lines('skip', 'warning', [(str(order), "Ya existe, se omite.") for order in skipped_names])
+            if grouped_orders:
+                yield grouped_orders
 
+    def _find_import_file(self, checksum):
+        return self.env['sale.import.file'].search([
+            ('checksum', '=', checksum),
+            ('company_id', '=', self.env.company.id),
+        ], limit=1)
+
+    def _import_file_fingerprint(self, data):
+        """Huella (sha1, tamaño) del archivo subido."""
+        if isinstance(data, bytes):
+            return hashlib.sha1(data).hexdigest(), len(data)
+        sha = hashlib.sha1()
+        with open(data, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+        return sha.hexdigest(), os.path.getsize(data)
+
+    def _check_import_file(self, checksum):
+        """Si ese mismo archivo ya se había importado devuelve un mensaje (salvo que se omitan las
+        órdenes existentes: entonces se puede completar lo que falta)."""
+        import_file = self._find_import_file(checksum)
+        if not import_file:
+            return None
+        message = (
+            f"Este archivo ya se importó antes ({import_file.name}; importaciones: {import_file.import_count}; "
+            f"última: {fields.Datetime.to_string(import_file.last_import_date)})."
+        )
         if self.simulate:
-            for order_name, lines in grouped_orders.items():
-                first = lines[0]
-                company = self._get_company(first.get('__company_name__'))
-                partner = self._get_partner(first.get('__partner_name__'), company)
-                if not partner:
-                    errors.append(f"{order_name}: Cliente no encontrado por nombre/ref: {first.get('__partner_name__')}")
-                has_free = any(self._norm_str(l.get('default_code') or l.get('order_line/product_id/default_code')) is None for l in lines)
-                if has_free and not self.service_product_id:
-                    errors.append(f"{order_name}: Hay líneas sin default_code y no se indicó 'Producto servicio (líneas libres)' en el wizard.")
-            if errors:
-                summary.append("\nErrores detectados:")
-                summary.extend(errors)
-            self.result_summary = "\n".join(summary)
-            return {
-                "type": "ir.actions.act_window",
-                "res_model": "sale.import.wizard",
-                "view_mode": "form",
-                "res_id": self.id,
-                "target": "new",
-            }
+            return message
+        if not self.skip_existing:
+            return message + " Active 'Omitir órdenes ya importadas' para completar sólo las órdenes que faltan."
+        return None
 
-        posted_invoices = self.env['account.move']
-        try:
-            for order_name, lines in grouped_orders.items():
-                order_errors = []
-                invoices_to_post = self.env['account.move']
-                try:
-                    with self.env.cr.savepoint():
-                        first = lines[0]
-                        company = self._get_company(first.get('__company_name__'))
-                        partner = self._get_partner(first.get('__partner_name__'), company)
-                        if not partner:
-                            order_errors.append(f"Cliente no encontrado por nombre/ref: {first.get('__partner_name__')}")
-
-                        journal_code = first.get('__journal_code__')
-                        order_lines = []
-                        iva_21 = self._get_tax_iva_21_sale(company)
-
-                        for row in lines:
-                            qty = row.get('order_line/product_uom_qty') or 1.0
-                            try:
-                                qty = float(qty)
-                            except Exception:
-                                qty = 1.0
-
-                            price_unit = row.get('order_line/price_unit')
-                            try:
-                                price_unit = float(price_unit) if price_unit is not None else None
-                            except Exception:
-                                price_unit = None
-
-                            default_code = self._norm_str(row.get('default_code') or row.get('order_line/product_id/default_code'))
-                            desc = self._norm_str(row.get('order_line/product_id/name'))
-
-                            if default_code:
-                                Product = self.env['product.product'].with_company(company.id)
-                                product = Product.search([
-                                    ('default_code', '=', default_code),
-                                    '|', ('company_id', '=', company.id), ('company_id', '=', False),
-                                ], limit=1)
-
-                                if not product:
-                                    order_errors.append(f"Producto no encontrado - código: {default_code}")
-                                    continue
-                                line_vals = {'product_id': product.id, 'product_uom_qty': qty}
-                                if price_unit is not None:
-                                    line_vals['price_unit'] = price_unit
-                                else:
-                                    line_vals['price_unit'] = self._price_for_product(product, qty, partner)
-                            else:
-                                if not self.service_product_id:
-                                    order_errors.append("Línea sin default_code requiere 'Producto servicio (líneas libres)'.")
-                                    continue
-                                if not desc:
-                                    order_errors.append("Línea personalizada sin descripción.")
-                                    continue
-                                if price_unit is None:
-                                    order_errors.append("Línea personalizada sin price_unit.")
-                                    continue
-                                line_vals = {
-                                    'product_id': self.service_product_id.id,
-                                    'name': desc,
-                                    'product_uom_qty': qty,
-                                    'price_unit': price_unit,
-                                    'tax_id': [(6, 0, [iva_21.id])] if iva_21 else [],
-                                }
-                            order_lines.append((0, 0, line_vals))
-
-                        if not order_lines and not order_errors:
-                            order_errors.append("No se agregaron líneas válidas.")
-
-                        if order_errors:
-                            raise UserError("\n- ".join([f"{order_name}: {msg}" for msg in order_errors]))
-
-                        order_vals = {
-                            'name': str(order_name),
-                            'partner_id': partner.id,
-                            'company_id': company.id,
-                            'date_order': self._to_date(first.get('date_order')),
-                            'invoice_date_import': self._to_date(first.get('invoice_date_import')),
-                            'order_line': order_lines,
-                        }
-                        sale_order = self.env['sale.order'].with_context(auto_invoice_on_import=True).create(order_vals)
-
-                        for invoice in sale_order.invoice_ids:
-                            if journal_code:
-                                j = self._find_sale_journal(journal_code, company)
-                                if j:
-                                    invoice.journal_id = j.id
-                                else:
-                                    raise UserError(
-                                        f"{order_name}: No se encontró diario con código '{journal_code}' (normalizado: '{self._norm_journal_code(journal_code)}')."
-                                    )
-                            invoices_to_post |= invoice
-
-                except UserError as e:
-                    errors.append(str(e))
-                    if self.cancel_all_on_errors:
-                        raise
-                except Exception as e:
-                    errors.append(f"{order_name}: {str(e)}")
-                    if self.cancel_all_on_errors:
-                        raise
+    def _register_import_file(self, checksum, file_size):
+        """Guarda la huella del archivo o suma una importación. Sólo se llama después de una importación
+        que creó órdenes: si se canceló o falló, el mismo archivo se puede volver a subir."""
+        import_file = self._find_import_file(checksum)
+        if import_file:
+            import_file.write({
+                'import_count': import_file.import_count + 1,
+                'last_import_date': fields.Datetime.now(),
+            })
+        else:
+            self.env['sale.import.file'].create({
+                'name': self.file_name or checksum,
+                'checksum': checksum,
+                'file_size': file_size,
+            })
+
+    def _preflight(self, data):
+        """Valida el archivo completo contra el índice, lote por lote.
+        Devuelve (cantidad de órdenes a importar, errores, índice, órdenes omitidas)."""
+        errors = []
+        skipped = []
+        order_count = 0
+        index = None
+        for grouped_orders in self._iter_pending_orders(data, skipped):
+            order_count += len(grouped_orders)
+            if self.simulate:
+                self._log_orders('preflight', grouped_orders)
+            with import_stage(self.env, "índice (búsquedas)", rows=len(grouped_orders)):
+                index = self._build_import_index(grouped_orders, index)
+            with import_stage(self.env, "validación de órdenes", rows=len(grouped_orders)):
+                chunk_errors = []
+                for order_name, lines in grouped_orders.items():
+                    chunk_errors.extend(self._simulate_order(order_name, lines, index))
+            self._log_errors('preflight', chunk_errors)
+            errors.extend(chunk_errors)
+        return order_count, errors, index, skipped
+
+    def _import_grouped_orders(self, grouped_orders, index, errors):
+        """Importa un lote de órdenes ya agrupadas y resueltas en `index`.
+        Devuelve las facturas generadas (publicadas si se pidió validarlas)."""
+        all_invoices = self.env['account.move']
+        batch_size = max(self.batch_size, 1) if self.batch_create or self.chunk_savepoints else 1
+        items = list(grouped_orders.items())
+        with import_stage(self.env, "creación de órdenes", rows=len(items)):
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                if len(batch) > 1:
+                    invoices = self._import_order_batch(batch, index, errors)
                 else:
-                    if self.validate_invoice:
-                        for invoice in invoices_to_post:
-                            invoice.action_post()
-                            posted_invoices |= invoice
+                    invoices = self._import_order(*batch[0], index, errors)
+                all_invoices |= invoices
+        if self.validate_invoice:
+            with import_stage(self.env, "publicación de facturas", rows=len(all_invoices)):
+                self._post_invoices(all_invoices)
+        return all_invoices
 
-            if errors and self.cancel_all_on_errors:
-                raise UserError("Se detectaron errores y se canceló toda la importación:\n- " + "\n- ".join(errors))
+    def _is_afip_journal(self, journal):
+        """Diarios que piden CAE a AFIP (l10n_ar_edi): su _post confirma la transacción después de cada CAE."""
+        return bool(journal._fields.get('l10n_ar_afip_ws') and journal.l10n_ar_afip_ws)
 
-        except UserError as ue:
-            summary.append(str(ue))
-            self.result_summary = "\n".join(summary)
-            return {
-                "type": "ir.actions.act_window",
-                "res_model": "sale.import.wizard",
-                "view_mode": "form",
-                "res_id": self.id,
-                "target": "new",
-            }
+    def _post_invoices(self, invoices):
+        """Publica las facturas agrupadas por diario: un action_post por diario, cada uno en su savepoint.
+        Si un grupo falla se publica factura por factura, así el error corresponde a la factura que lo causa.
+        Las de diarios AFIP quedan en borrador: las publica _post_afip_invoices fuera de todo savepoint."""
+        by_journal = {}
+        for invoice in invoices:
+            if not self._is_afip_journal(invoice.journal_id):
+                by_journal.setdefault(invoice.journal_id, []).append(invoice.id)
+        for journal, invoice_ids in by_journal.items():
+            group = invoices.browse(invoice_ids)
+            try:
+                with self.env.cr.savepoint():
+                    group.action_post()
+            except Exception as e:
+                _logger.warning("Falló la publicación en lote del diario %s, se publica de a una: %s", journal.display_name, e)
+                for invoice in group:
+                    invoice.action_post()
+
+    def _post_afip_invoices(self, invoices, errors):
+        """Publica las facturas de diarios AFIP, un action_post por diario y sin savepoint: l10n_ar_edi hace
+        commit después de cada CAE, así que antes se confirma lo importado. Si AFIP rechaza una factura se
+        deshace sólo lo pendiente (las ya validadas quedaron confirmadas) y se informa, como l10n_ar_edi,
+        qué facturas se validaron y cuáles no."""
+        by_journal = {}
+        for invoice in invoices:
+            if invoice.state == 'draft' and self._is_afip_journal(invoice.journal_id):
+                by_journal.setdefault(invoice.journal_id, []).append(invoice.id)
+        if not by_journal:
+            return
+        self.env.cr.commit()
+        for journal, invoice_ids in by_journal.items():
+            group = invoices.browse(invoice_ids)
+            try:
+                group.action_post()
+            except Exception as e:
+                self.env.cr.rollback()
+                self.env.invalidate_all()
+                validated = group.filtered(lambda inv: inv.state == 'posted')
+                # l10n_ar_edi procesa en orden y se detiene en la primera factura rechazada
+                unprocessed = group - validated
+                _logger.warning("AFIP detuvo la publicación del diario %s: %d validadas, %d sin validar: %s",
+                                journal.display_name, len(validated), len(unprocessed), e)
+                if not unprocessed:
+                    # Falló después del último CAE: todas quedaron validadas
+                    errors.append(f"Diario {journal.display_name} – error después de validar todas las facturas en AFIP – {e}")
+                    self.env.cr.commit()
+                    continue
+                errors.append(f"{unprocessed[0].invoice_origin}: Factura no validada en AFIP: {e}")
+                errors.extend(
+                    f"{invoice.invoice_origin}: Factura sin enviar a AFIP (se detuvo el lote del diario {journal.display_name})."
+                    for invoice in unprocessed[1:]
+                )
+                self.env.cr.commit()
+                if self.cancel_all_on_errors:
+                    return
+
+    def _prepare_worker_vals(self):
+        """Configuración con la que cada hilo recrea el wizard (con new(), en su propio cursor)."""
+        return {
+            'file_name': self.file_name,
+            'service_product_id': self.service_product_id.id,
+            'validate_invoice': self.validate_invoice,
+            'cancel_all_on_errors': self.cancel_all_on_errors,
+            'batch_create': self.batch_create,
+            'chunk_savepoints': self.chunk_savepoints,
+            'batch_size': self.batch_size,
+        }
+
+    def _partition_orders(self, grouped_orders, index):
+        """Agrupa las órdenes del lote por compañía resuelta: las de una misma compañía reservan los mismos
+        stock.quant, así que nunca se reparten entre hilos. Devuelve {etiqueta: {order_name: [filas]}}."""
+        partitions = {}
+        for order_name, lines in grouped_orders.items():
+            partitions.setdefault(index['companies'][order_name].name, {})[order_name] = lines
+        return partitions
+
+    def _parallel_barrier_timeout(self):
+        """Espera máxima en la barrera: la mitad del límite de tiempo de la petición, así se deshace
+        el lote antes de que el servidor corte el proceso."""
+        limit = config.get('limit_time_real') or 0
+        return limit / 2 if limit > 0 else 60
+
+    def _assign_partitions(self, partitions):
+        """Reparte las particiones entre a lo sumo `parallel_workers` hilos, equilibrando la cantidad de órdenes."""
+        workers = [[] for _i in range(min(max(self.parallel_workers, 1), len(partitions)))]
+        loads = [0] * len(workers)
+        for label, orders in sorted(partitions.items(), key=lambda item: -len(item[1])):
+            worker = loads.index(min(loads))
+            workers[worker].append((label, orders))
+            loads[worker] += len(orders)
+        return workers
+
+    def _run_import_worker(self, uid, context, vals, partitions, results, barrier, decision, barrier_timeout):
+        """Importa sus particiones en un cursor propio. Antes de confirmar espera en `barrier` a los demás
+        hilos: la decisión común (confirmar o deshacer todo) queda en `decision`.
+        No usa self.env: su cursor pertenece al hilo principal."""
+        threading.current_thread().uid = uid
+        threading.current_thread().dbname = self.pool.db_name
+        result = {'partitions': [], 'errors': [], 'invoice_ids': [], 'order_ids': [], 'cancelled': False, 'failed': None}
+        cr = None
+        try:
+            # Dentro del try: si no hay conexión libre el hilo igual llega a la barrera y se deshace todo
+            cr = self.pool.cursor()
+            cr.execute("SET LOCAL lock_timeout = %s", [PARALLEL_LOCK_TIMEOUT])
+            env = api.Environment(cr, uid, context)
+            wizard = env['sale.import.wizard'].new(vals)
+            index = None
+            for label, grouped_orders in partitions:
+                error_count = len(result['errors'])
+                index = wizard._build_import_index(grouped_orders, index)
+                invoices = wizard._import_grouped_orders(grouped_orders, index, result['errors'])
+                result['invoice_ids'] += invoices.ids
+                result['order_ids'] = index['created_order_ids']
+                result['partitions'].append((label, len(grouped_orders), len(result['errors']) - error_count))
+            env.flush_all()
+        except UserError:
+            # Error de una orden con 'Cancelar todo si hay errores': el mensaje ya está en result['errors']
+            result['cancelled'] = True
         except Exception as e:
-            summary.append(f"❌ Error crítico, se deshizo todo: {str(e)}")
-            self.result_summary = "\n".join(summary)
-            return {
-                "type": "ir.actions.act_window",
-                "res_model": "sale.import.wizard",
-                "view_mode": "form",
-                "res_id": self.id,
-                "target": "new",
-            }
+            _logger.exception("Falló el hilo de importación de %s", [label for label, _orders in partitions])
+            result['failed'] = str(e)
+        finally:
+            results.append(result)
+            try:
+                barrier.wait(timeout=barrier_timeout)
+            except threading.BrokenBarrierError:
+                decision['commit'] = False
+        if cr is not None:
+            try:
+                if decision['commit']:
+                    cr.commit()
+                else:
+                    cr.rollback()
+            finally:
+                cr.close()
+        return result
 
-        if self.validate_invoice and posted_invoices:
-            report = self._get_invoice_report_action()
-            if len(posted_invoices) == 1:
-                return report.report_action(posted_invoices)
-            pdf_zip = io.BytesIO()
-            with zipfile.ZipFile(pdf_zip, 'w', zipfile.ZIP_DEFLATED) as zf:
-                for inv in posted_invoices:
-                    pdf, _ = report._render_qweb_pdf(inv.id)
-                    pdf_name = inv._get_report_base_filename() + '.pdf'
-                    zf.writestr(pdf_name, pdf)
-            pdf_zip.seek(0)
-            attachment = self.env['ir.attachment'].create({
-                'name': 'invoices.zip',
-                'type': 'binary',
-                'datas': base64.b64encode(pdf_zip.read()),
-                'mimetype': 'application/zip',
-            })
-            return {
-                'type': 'ir.actions.act_url',
-                'url': f'/web/content/{attachment.id}?download=true',
-                'target': 'self',
-            }
+    def _parallel_commit_decision(self, results, cancel_all_on_errors):
+        if any(result['failed'] or result['cancelled'] for result in results):
+            return False
+        return not (cancel_all_on_errors and any(result['errors'] for result in results))
 
-        if errors:
-            summary.append("Errores detectados:")
-            summary.extend(errors)
-        else:
-            summary.append("Importación completada sin errores.")
+    def _import_in_parallel(self, grouped_orders, index, errors, summary):
+        """Importa el lote repartiendo las particiones entre hilos con su propio cursor y transacción.
+        Devuelve las facturas generadas, ya confirmadas."""
+        partitions = self._partition_orders(grouped_orders, index)
+        if len(partitions) < 2:
+            return self._import_grouped_orders(grouped_orders, index, errors)
 
-        self.result_summary = "\n".join(summary)
+        # Lo pendiente en esta transacción (p. ej. un lote anterior de una sola partición) se confirma antes:
+        # si no, sus bloqueos (stock.quant, ...) frenarían a los hilos mientras este espera su resultado,
+        # un bloqueo mutuo que PostgreSQL no puede detectar
+        self.env.cr.commit()
+        groups = self._assign_partitions(partitions)
+        results = []
+        decision = {'commit': False}
+        cancel_all_on_errors = self.cancel_all_on_errors
+        barrier = threading.Barrier(len(groups), action=lambda: decision.update(
+            commit=self._parallel_commit_decision(results, cancel_all_on_errors)))
+        vals = self._prepare_worker_vals()
+        context = {key: value for key, value in self.env.context.items() if key != PROFILER_CONTEXT_KEY}
+        with ThreadPoolExecutor(max_workers=len(groups), thread_name_prefix='sale_import') as executor:
+            futures = [
+                executor.submit(self._run_import_worker, self.env.uid, context, vals, group, results, barrier, decision,
+                                self._parallel_barrier_timeout())
+                for group in groups
+            ]
+            for future in futures:
+                future.result()
+
+        for result in results:
+            errors.extend(result['errors'])
+            index['created_order_ids'].extend(result['order_ids'])
+            for label, order_count, error_count in result['partitions']:
+                summary.append(f"Partición {label}: {order_count} órdenes, {error_count} errores")
+        failed = [result['failed'] for result in results if result['failed']]
+        if failed:
+            raise UserError("Falló un proceso en paralelo y se deshizo el lote completo:\n- " + "\n- ".join(failed))
+        if not decision['commit']:
+            raise UserError("Se detectaron errores y se canceló el lote en paralelo:\n- " + "\n- ".join(errors))
+
+        # Las órdenes ya quedaron confirmadas por los hilos: se confirma también esta transacción
+        # para que las vea (p. ej. al armar los PDF)
+        self.env.cr.commit()
+        self.env.invalidate_all()
+        return self.env['account.move'].browse(
+            invoice_id for result in results for invoice_id in result['invoice_ids'])
+
+    def _prepare_job_vals(self):
+        return {
+            'file': self.file,
+            'attachment_id': self.attachment_ids[:1].id,
+            'file_name': self.file_name,
+            'allowed_company_ids': [(6, 0, self.env.companies.ids)],
+            'service_product_id': self.service_product_id.id,
+            'validate_invoice': self.validate_invoice,
+            'cancel_all_on_errors': self.cancel_all_on_errors,
+            'preflight': self.preflight,
+            'skip_existing': self.skip_existing,
+            'batch_create': self.batch_create,
+            'chunk_savepoints': self.chunk_savepoints,
+            'batch_size': self.batch_size,
+            'streaming': self.streaming,
+        }
+
+    def _action_run_in_background(self):
+        job = self.env['sale.import.job'].create(self._prepare_job_vals())
+        self.env.ref('auto_sale_import_mixed_lines.ir_cron_sale_import_job').sudo()._trigger()
         return {
             "type": "ir.actions.act_window",
-            "res_model": "sale.import.wizard",
+            "res_model": "sale.import.job",
             "view_mode": "form",
-            "res_id": self.id,
-            "target": "new",
+            "res_id": job.id,
+            "target": "current",
+        }
+
+    def _order_count_lines(self, order_count, skipped):
+        lines = [f"Órdenes detectadas: {order_count + len(skipped)}"]
+        if skipped:
+            lines.append(f"Órdenes ya existentes (se omiten): {len(skipped)}")
+        return lines
+
+    def _error_summary_lines(self, errors):
+        lines = [f"\nErrores detectados: {len(errors)}"]
+        lines.extend(errors[:ERROR_PREVIEW])
+        if len(errors) > ERROR_PREVIEW:
+            lines.append(f"… y {len(errors) - ERROR_PREVIEW} más (ver el registro de la importación).")
+        return lines
+
+    def _set_result_summary(self, summary, state='done', order_count=0, skipped=()):
+        """Guarda el resumen (sin el detalle por orden, que queda en el registro) y cierra el registro.
+        Agrega y registra en el log los tiempos por etapa si se midieron."""
+        profiler = self.env.context.get(PROFILER_CONTEXT_KEY)
+        if profiler:
+            summary = summary + profiler.summary_lines()
+            profiler.log(_logger, self.file_name or self.id)
+        self.result_summary = "\n".join(summary)
+        if self.run_id:
+            self.run_id.write({
+                'state': state,
+                'order_count': order_count + len(skipped),
+                'skipped_count': len(skipped),
+                'summary': self.result_summary,
+            })
+
+    def action_view_run_lines(self):
+        self.ensure_one()
+        return self.run_id.action_view_lines()
+
+    def _created_orders(self, index):
+        """Órdenes creadas por la importación que siguen existiendo (las de lotes deshechos no)."""
+        return self.env['sale.order'].browse(index['created_order_ids'] if index else []).exists()
+
+    def _import_result(self, state, order_count=0, skipped=(), errors=(), invoices=None, action=None, orders=None):
+        """Resultado legible por máquina de una importación (ver import_sales_file)."""
+        invoices = invoices or self.env['account.move']
+        orders = orders or self.env['sale.order']
+        return {
+            'state': state,
+            'order_count': order_count + len(skipped),
+            'skipped_count': len(skipped),
+            'error_count': len(errors),
+            'errors': list(errors),
+            'order_ids': orders.ids,
+            'invoice_ids': invoices.ids,
+            'run_id': self.run_id.id,
+            'summary': self.result_summary,
+            'action': action,
         }
+
+    def _run_import(self, data, export_pdf=True):
+        """Importa (o simula) el contenido `data` con la configuración del wizard.
+        Devuelve el resultado de _import_result; en 'action' va la descarga de los PDF si se exportaron."""
+        fingerprint = self._import_file_fingerprint(data)
+        file_message = self._check_import_file(fingerprint[0])
+        if file_message and not self.simulate:
+            self.result_summary = file_message
+            return self._import_result('duplicate', errors=[file_message])
+
+        profiler = ImportProfiler(self.env.cr, self.slow_order_threshold)
+        self = self.with_context(**{PROFILER_CONTEXT_KEY: profiler})
+        self.run_id = self.env['sale.import.run'].create({
+            'file_name': self.file_name,
+            'simulate': self.simulate,
+        })
+
+        errors = []
+        summary = []
+        skipped = []
+        order_count = 0
+        index = None
+
+        if self.simulate or (self.preflight and self.cancel_all_on_errors):
+            with import_stage(self.env, "validación previa"):
+                order_count, errors, index, skipped = self._preflight(data)
+            if self.simulate or errors:
+                summary = self._order_count_lines(order_count, skipped)
+                if file_message:
+                    summary.insert(0, file_message)
+                if index:
+                    summary.extend(self._index_summary(index))
+                if errors:
+                    if not self.simulate:
+                        summary.append("\nLa validación previa encontró errores, no se importó ninguna orden.")
+                    summary.extend(self._error_summary_lines(errors))
+                state = 'done' if self.simulate else 'cancelled'
+                self._set_result_summary(summary, state, order_count, skipped)
+                return self._import_result(state, order_count, skipped, errors)
+            # Se reutiliza lo ya resuelto: la importación no repite las consultas
+            if index:
+                index['stats'] = dict.fromkeys(index['stats'], 0)
+            skipped = []
+            order_count = 0
+            self.run_id.line_ids.unlink()
+
+        chunks = self._iter_pending_orders(data, skipped)
+        all_invoices = self.env['account.move']
+        # Sin hilos todo corre en esta transacción: si se cancela o falla no queda ninguna orden.
+        # En paralelo cada lote se confirma al terminar y el resultado informa las órdenes que quedaron.
+        savepoint = self.parallel_workers <= 1
+        try:
+            with self.env.cr.savepoint() if savepoint else nullcontext():
+                for grouped_orders in chunks:
+                    order_count += len(grouped_orders)
+                    self._log_orders('import', grouped_orders)
+                    with import_stage(self.env, "índice (búsquedas)", rows=len(grouped_orders)):
+                        index = self._build_import_index(grouped_orders, index)
+                    logged = len(errors)
+                    try:
+                        if self.parallel_workers > 1:
+                            with import_stage(self.env, "importación en paralelo", rows=len(grouped_orders)):
+                                invoices = self._import_in_parallel(grouped_orders, index, errors, summary)
+                        else:
+                            invoices = self._import_grouped_orders(grouped_orders, index, errors)
+                    finally:
+                        self._log_errors('import', errors[logged:])
+                    all_invoices |= invoices
+
+                if errors and self.cancel_all_on_errors:
+                    raise UserError("Se detectaron errores y se canceló toda la importación.")
+
+            if self.validate_invoice:
+                logged = len(errors)
+                with import_stage(self.env, "publicación en AFIP", rows=len(all_invoices)):
+                    self._post_afip_invoices(all_invoices, errors)
+                self._log_errors('import', errors[logged:])
+
+        except UserError as ue:
+            if savepoint:
+                # El registro de errores se deshizo junto con el savepoint
+                self._log_errors('import', errors)
+            orders = self._created_orders(index)
+            if orders:
+                self._register_import_file(*fingerprint)
+            summary[:0] = self._order_count_lines(order_count, skipped)
+            if index:
+                summary.extend(self._index_summary(index))
+            # El detalle de los errores ya está en `errors` (y en el registro)
+            summary.append(str(ue).split("\n", 1)[0])
+            if orders:
+                summary.append(f"Quedaron importadas {len(orders)} órdenes de lotes ya confirmados.")
+            if errors:
+                summary.extend(self._error_summary_lines(errors))
+            self._set_result_summary(summary, 'cancelled', order_count, skipped)
+            return self._import_result('cancelled', order_count, skipped, errors or [str(ue)],
+                                       orders.invoice_ids, orders=orders)
+        except Exception as e:
+            if savepoint:
+                self._log_errors('import', errors)
+            orders = self._created_orders(index)
+            if orders:
+                self._register_import_file(*fingerprint)
+            summary[:0] = self._order_count_lines(order_count, skipped)
+            if index:
+                summary.extend(self._index_summary(index))
+            if orders:
+                summary.append(f"❌ Error crítico: {str(e)}")
+                summary.append(f"Quedaron importadas {len(orders)} órdenes de lotes ya confirmados.")
+            else:
+                summary.append(f"❌ Error crítico, se deshizo todo: {str(e)}")
+            self._log_lines('import', 'error', [(False, f"Error crítico: {e}")])
+            self._set_result_summary(summary, 'failed', order_count, skipped)
+            return self._import_result('failed', order_count, skipped, errors + [str(e)],
+                                       orders.invoice_ids, orders=orders)
+
+        summary[:0] = self._order_count_lines(order_count, skipped)
+        if index:
+            summary.extend(self._index_summary(index))
+        if errors:
+            summary.extend(self._error_summary_lines(errors))
+        else:
+            summary.append("Importación completada sin errores.")
+
+        action = None
+        posted_invoices = all_invoices.filtered(lambda inv: inv.state == 'posted') if self.validate_invoice \
+            else self.env['account.move']
+        if export_pdf and posted_invoices:
+            # report_action copia el contexto en la acción que va al cliente: sin el perfilador
+            report = self._get_invoice_report_action().with_context(
+                {key: value for key, value in self.env.context.items() if key != PROFILER_CONTEXT_KEY})
+            if len(posted_invoices) == 1:
+                action = report.report_action(posted_invoices)
+            else:
+                with import_stage(self.env, "PDF de facturas", rows=len(posted_invoices)):
+                    attachment = self._export_invoices_zip(report, posted_invoices)
+                action = {
+                    'type': 'ir.actions.act_url',
+                    'url': f'/web/content/{attachment.id}?download=true',
+                    'target': 'self',
+                }
+        orders = self._created_orders(index)
+        if orders:
+            self._register_import_file(*fingerprint)
+        self._set_result_summary(summary, 'done', order_count, skipped)
+        return self._import_result('done', order_count, skipped, errors, all_invoices, action, orders)
+
+    def action_import_sales(self):
+        self.ensure_one()
+        if not self.file and not self.attachment_ids:
+            return
+        if len(self.attachment_ids) > 1:
+            raise UserError("Adjuntá un solo archivo.")
+        if self.attachment_ids and not self.file_name:
+            self.file_name = self.attachment_ids.name
+
+        data = self._get_import_data()
+        if self.run_in_background and not self.simulate:
+            file_message = self._check_import_file(self._import_file_fingerprint(data)[0])
+            if file_message:
+                self.result_summary = file_message
+                return self._action_reopen()
+            return self._action_run_in_background()
+
+        result = self._run_import(data)
+        return result['action'] or self._action_reopen()
+
+    def _get_import_file_path(self, path):
+        """Ruta real de un archivo del servidor, sólo para administradores y dentro del directorio
+        configurado en el parámetro del sistema auto_sale_import_mixed_lines.import_dir."""
+        if not self.env.is_admin():
+            raise UserError("Sólo un administrador puede importar archivos del servidor.")
+        base_dir = self.env['ir.config_parameter'].sudo().get_param('auto_sale_import_mixed_lines.import_dir')
+        if not base_dir:
+            raise UserError("Falta configurar el parámetro del sistema 'auto_sale_import_mixed_lines.import_dir'.")
+        base_dir = os.path.realpath(base_dir)
+        real_path = os.path.realpath(os.path.join(base_dir, path))
+        if os.path.commonpath([base_dir, real_path]) != base_dir:
+            raise UserError(f"El archivo {path} está fuera del directorio de importación.")
+        if not os.path.isfile(real_path):
+            raise UserError(f"No existe el archivo {path}.")
+        return real_path
+
+    @api.model
+    def import_sales_file(self, path=None, attachment_id=None, options=None):
+        """Importa sin pasar por el formulario (XML-RPC/JSON-RPC, odoo-bin shell, acciones planificadas).
+
+        Recibe una ruta del servidor (relativa al directorio de importación o absoluta dentro de él) o el id
+        de un ir.attachment, y las mismas opciones del wizard en `options` (ej. {'validate_invoice': True}).
+        Devuelve {'state', 'order_count', 'skipped_count', 'error_count', 'errors', 'order_ids',
+        'invoice_ids', 'run_id', 'summary'}; no arma los PDF."""
+        if bool(path) == bool(attachment_id):
+            raise UserError("Indicá una ruta de archivo o un adjunto (uno de los dos).")
+        options = dict(options or {})
+        unknown = set(options) - set(HEADLESS_OPTIONS)
+        if unknown:
+            raise UserError(f"Opciones desconocidas: {', '.join(sorted(unknown))}.")
+
+        if path:
+            real_path = self._get_import_file_path(path)
+            # Los lectores aceptan rutas: el archivo no se carga entero en memoria
+            data = real_path
+            file_name = os.path.basename(real_path)
+        else:
+            attachment = self.env['ir.attachment'].browse(attachment_id).exists()
+            if not attachment:
+                raise UserError(f"No existe el adjunto {attachment_id}.")
+            attachment.check('read')
+            data = self._get_attachment_data(attachment)
+            file_name = attachment.name
+
+        # En memoria: ni el archivo ni el wizard se guardan en la base. new() no aplica los valores
+        # por defecto: se parte de los del formulario
+        vals = self.default_get(list(self._fields))
+        vals.update(options, file_name=file_name)
+        wizard = self.new(vals)
+        result = wizard._run_import(data, export_pdf=False)
+        result.pop('action')
+        return result
@@ -1,6 +1,6 @@
 {
     "name": "Invoice PDF Filename: SO first",
-    "version": "17.0.1.0.3",
+    "version": "17.0.1.1.0",
     "category": "Accounting",
     "summary": "Prefix invoice PDF filename with Sale Order name, then the invoice number.",
     "author": "Matías Artesi",
@@ -1,9 +1,27 @@
 import re
-from odoo import models
+from odoo import api, fields, models
+
+INVOICE_MOVE_TYPES = ('out_invoice', 'out_refund', 'in_invoice', 'in_refund')
+
+# Sanitizing patterns, compiled once at import time
+ILLEGAL_FILENAME_CHARS_RE = re.compile(r'[\\:*?"<>|]')
+WHITESPACE_RE = re.compile(r'\s+')
+
 
 class AccountMove(models.Model):
     _inherit = 'account.move'
 
+    # Not stored: computed in batch for every move in the prefetch set, so printing many
+    # invoices composes all their filenames at once
+    so_first_report_filename = fields.Char(compute='_compute_so_first_report_filename')
+
+    @api.depends('name', 'state', 'move_type', 'invoice_origin',
+                 'invoice_line_ids.sale_line_ids.order_id.name')
+    def _compute_so_first_report_filename(self):
+        filenames = self._compose_invoice_filenames()
+        for move in self:
+            move.so_first_report_filename = filenames[move.id]
+
     # --- helpers ---
     def _sanitize_filename_part(self, s):
         """Return a filesystem-friendly chunk for filenames.
@@ -14,43 +32,55 @@ class AccountMove(models.Model):
         """
         s = (s or "").strip()
         s = s.replace("/", "-")
-        s = re.sub(r'[\\:*?"<>|]', '', s)   # remove illegal in common FS
-        s = re.sub(r'\s+', '_', s)          # collapse whitespace
+        s = ILLEGAL_FILENAME_CHARS_RE.sub('', s)   # remove illegal in common FS
+        s = WHITESPACE_RE.sub('_', s)              # collapse whitespace
         return s.strip(' ._-')
 
-    def _compose_invoice_filename(self):
-        self.ensure_one()
+    def _compose_invoice_filenames(self):
+        """Return {move id: base filename} for the whole recordset.
 
-        # Invoice identifier
-        inv_name = self.name or ""
-        if self.state == 'draft' or not inv_name or inv_name in ('/', ''):
-            inv_name = f"DRAFT-{self.id}"
+        Invoice lines, their sale lines and the sale orders are read once for all
+        the moves instead of through a lazy-load chain per invoice.
+        """
+        # prefetch: one read per level for every move in self
+        self.invoice_line_ids.sale_line_ids.order_id.mapped('name')
+
+        filenames = {}
+        for move in self:
+            # Invoice identifier
+            inv_name = move.name or ""
+            if move.state == 'draft' or not inv_name or inv_name in ('/', ''):
+                inv_name = f"DRAFT-{move.id}"
+
+            # Try to find the originating SO name (prefer the first related SO)
+            sale_names = move.invoice_line_ids.mapped('sale_line_ids.order_id.name')
+            origin = sale_names[0] if sale_names else (move.invoice_origin or "")
 
-        # Try to find the originating SO name (prefer the first related SO)
-        sale_names = self.invoice_line_ids.mapped('sale_line_ids.order_id.name')
-        origin = sale_names[0] if sale_names else (self.invoice_origin or "")
+            # If there are multiple origins in a string, keep the first token
+            if isinstance(origin, str) and ',' in origin:
+                origin = origin.split(',')[0].strip()
 
-        # If there are multiple origins in a string, keep the first token
-        if isinstance(origin, str) and ',' in origin:
-            origin = origin.split(',')[0].strip()
+            # sanitize
+            origin_part = move._sanitize_filename_part(origin)
+            inv_part = move._sanitize_filename_part(inv_name) or f"INV-{move.id}"
 
-        # sanitize
-        origin_part = self._sanitize_filename_part(origin)
-        inv_part = self._sanitize_filename_part(inv_name) or f"INV-{self.id}"
+            # Apply prefix when an origin is present for supported move types
+            if move.move_type in INVOICE_MOVE_TYPES and origin_part:
+                base = f"{origin_part}-{inv_part}"
+            else:
+                base = inv_part
 
-        # Apply prefix when an origin is present for supported move types
-        if self.move_type in ('out_invoice', 'out_refund', 'in_invoice', 'in_refund') and origin_part:
-            base = f"{origin_part}-{inv_part}"
-        else:
-            base = inv_part
+            # keep it reasonable length
+            filenames[move.id] = base[:180] or f"INVOICE-{move.id}"
+        return filenames
 
-        # keep it reasonable length
-        return base[:180] or f"INVOICE-{self.id}"
+    def _compose_invoice_filename(self):
+        self.ensure_one()
+        return self._compose_invoice_filenames()[self.id]
 
     # --- hook used by ir.actions.report ---
     def _get_report_base_filename(self):
         self.ensure_one()
-        if self.move_type in ('out_invoice', 'out_refund', 'in_invoice', 'in_refund'):
-            return self._compose_invoice_filename()
+        if self.move_type in INVOICE_MOVE_TYPES:
+            return self.so_first_report_filename
         return super()._get_report_base_filename()
-
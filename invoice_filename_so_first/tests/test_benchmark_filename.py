@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import tempfile
+import time
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.tests import tagged
+
+_logger = logging.getLogger(__name__)
+
+INVOICE_COUNT = 1000
+
+
+@tagged('post_install', '-at_install', '-standard', 'invoice_filename_benchmark')
+class TestInvoiceFilenameBenchmark(AccountTestInvoicingCommon):
+    """Measure _get_report_base_filename over a large invoice recordset.
+
+    Not run by default: use --test-tags invoice_filename_benchmark. Results are written as JSON to
+    $INVOICE_FILENAME_BENCHMARK_OUTPUT (or invoice_filename_benchmark.json in the temp directory)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        orders = cls.env['sale.order'].create([{
+            'name': f"SO/BENCH/{n:05d}",
+            'partner_id': cls.partner_a.id,
+            'order_line': [(0, 0, {'product_id': cls.product_a.id, 'product_uom_qty': 1.0})],
+        } for n in range(INVOICE_COUNT)])
+        cls.invoices = cls.env['account.move'].create([{
+            'move_type': 'out_invoice',
+            'partner_id': cls.partner_a.id,
+            'invoice_date': '2024-01-01',
+            'invoice_line_ids': [(0, 0, {
+                'product_id': cls.product_a.id,
+                'quantity': 1.0,
+                'price_unit': 100.0,
+                'sale_line_ids': [(6, 0, order.order_line.ids)],
+            })],
+        } for order in orders])
+        cls.orders = orders
+        cls.results = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        module = cls.env['ir.module.module'].search([('name', '=', 'invoice_filename_so_first')])
+        output = os.environ.get('INVOICE_FILENAME_BENCHMARK_OUTPUT') or os.path.join(
+            tempfile.gettempdir(), 'invoice_filename_benchmark.json')
+        with open(output, 'w') as f:
+            json.dump({
+                'module_version': module.latest_version,
+                'invoices': INVOICE_COUNT,
+                'results': cls.results,
+            }, f, indent=2, sort_keys=True)
+        _logger.info("Invoice filename benchmark results written to %s", output)
+        super().tearDownClass()
+
+    def _measure(self, scenario, invoices, batch=False):
+        self.env.invalidate_all()
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        if batch:
+            filenames = list(invoices._compose_invoice_filenames().values())
+        else:
+            filenames = [invoice._get_report_base_filename() for invoice in invoices]
+        wall_time = time.perf_counter() - start
+        queries = self.env.cr.sql_log_count - queries
+        self.results[scenario] = {
+            'wall_time': round(wall_time, 3),
+            'queries': queries,
+            'queries_per_invoice': round(queries / len(invoices), 2),
+        }
+        _logger.info("Invoice filename benchmark %s: %s", scenario, self.results[scenario])
+        return filenames
+
+    def test_draft_invoices(self):
+        filenames = self._measure('draft', self.invoices)
+        for order, invoice, filename in zip(self.orders, self.invoices, filenames):
+            self.assertEqual(filename, f"SO-BENCH-{order.name[-5:]}-DRAFT-{invoice.id}")
+
+    def test_posted_invoices(self):
+        self.invoices.action_post()
+        filenames = self._measure('posted', self.invoices)
+        for order, invoice, filename in zip(self.orders, self.invoices, filenames):
+            self.assertTrue(filename.startswith(f"SO-BENCH-{order.name[-5:]}-"))
+            self.assertNotIn("/", filename)
+
+    def test_batch_api(self):
+        filenames = self._measure('batch_api', self.invoices, batch=True)
+        self.assertEqual(filenames, [invoice._get_report_base_filename() for invoice in self.invoices])
+        self.assertEqual(self.invoices[0]._compose_invoice_filename(), filenames[0])